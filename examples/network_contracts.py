@@ -8,7 +8,7 @@ import requests
 from typing import Callable, Any
 from principia import (
     AssumptionContract, AssuranceMatcher, ConfigurationError, PreconditionError,
-    IllegalStateError, be_a
+    IllegalStateError, be_a, have_json_keys
 )
 
 # --- Custom Semantic Checks for Networking ---
@@ -30,7 +30,7 @@ API_POSTCONDITION_CONTRACT = AssumptionContract(
     postcondition=AssuranceMatcher(None, name="API Response")
         .must(lambda r: r.status_code == 200, IllegalStateError, "API did not return a 200 OK (got {value.status_code}).")
         .must(lambda r: "application/json" in r.headers.get('Content-Type', ''), IllegalStateError, "API response is not JSON.")
-        .must(lambda r: "bitcoin" in r.json(), IllegalStateError, "API response JSON is missing required data."),
+        .must(have_json_keys({"bitcoin": dict}), IllegalStateError, "API response JSON is missing required data."),
     on_success="[Principia] ✅ API response validated successfully."
 )
 
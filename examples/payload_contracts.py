@@ -0,0 +1,75 @@
+# payload_contracts.py
+# Runs the payload checks against a local stand-in for a JSON API, so the
+# contracts can be exercised without network access.
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from principia import (
+    contract, AssumptionContract, AssuranceMatcher, IllegalStateError,
+    have_json_keys, have_json_key, json_body
+)
+
+# A large body whose required key comes first: the streaming check stops
+# reading long before the padding.
+BODY = json.dumps({"bitcoin": {"usd": 67000.5}, "padding": ["x" * 64] * 50_000}).encode()
+
+
+class StandInAPI(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = BODY if self.path == "/price" else b'{"error": "unknown coin"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Parse-once: every arm reads the same parsed body.
+PARSED_PAYLOAD_CONTRACT = AssumptionContract(
+    postcondition=AssuranceMatcher(None, name="API Response")
+        .must(lambda r: r.status_code == 200, IllegalStateError, "API did not return a 200 OK.")
+        .must(have_json_key("bitcoin", dict), IllegalStateError, "API response JSON is missing 'bitcoin'.")
+        .must(lambda r: json_body(r)["bitcoin"]["usd"] > 0, IllegalStateError, "API returned a non-positive price."),
+    on_success="[Principia] ✅ API payload validated (parsed once)."
+)
+
+# Streaming: checks the required key and its type without parsing the body.
+STREAMED_PAYLOAD_CONTRACT = AssumptionContract(
+    postcondition=AssuranceMatcher(None, name="API Response")
+        .must(lambda r: r.status_code == 200, IllegalStateError, "API did not return a 200 OK.")
+        .must(have_json_keys({"bitcoin": dict}), IllegalStateError, "API response JSON is missing 'bitcoin'."),
+    on_success="[Principia] ✅ API payload validated (streamed)."
+)
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    @contract(PARSED_PAYLOAD_CONTRACT)
+    def fetch_parsed(path: str) -> requests.Response:
+        return requests.get(base + path, timeout=5)
+
+    @contract(STREAMED_PAYLOAD_CONTRACT)
+    def fetch_streamed(path: str) -> requests.Response:
+        return requests.get(base + path, timeout=5, stream=True)
+
+    response = fetch_parsed("/price")
+    print(f"--> Parsed once: bitcoin is ${json_body(response)['bitcoin']['usd']:,.2f}")
+    response = fetch_streamed("/price")
+    print("--> Streamed: required key found without reading the whole body.")
+    # The bytes the check read were put back, so the body is still complete.
+    print(f"--> Caller still reads the full payload: {len(response.content):,} bytes.")
+    try:
+        fetch_streamed("/unknown")
+    except IllegalStateError as e:
+        print(f"--> FAILED AS EXPECTED! Reason: {e}")
+    server.shutdown()
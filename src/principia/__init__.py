@@ -1 +1,9 @@
 from .principia import *
+from .replay import TraceRecorder, TraceReader, TraceRecord, ReplayReport, replay
+from .files import (have_header, have_line_count, end_with_newline, have_checksum,
+                    be_well_formed_jsonl, scan_file, clear_file_cache)
+from .sharedcache import SharedMemoryCache
+from .incremental import (IncrementalMatcher, DatasetState, ColumnSummary, InMemoryStateStore,
+                          FileStateStore, be_monotonic, have_row_count)
+from .records import validated
+from .payload import json_body, scan_json_keys, have_json_keys, have_json_key
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+files.py: Content predicates for large files.
+
+`be_existing_file` only says that a path exists. The checks here look inside
+the file (header row, line count, trailing newline, checksum, JSONL
+well-formedness) by streaming over an `mmap` of it, so a multi-GB input is
+never loaded into Python objects.
+
+Each predicate asks only for the analysis it needs. The header and trailing
+newline are read directly and cost O(1). Line counts, JSONL validation and
+checksums need a full pass. A matcher collects the analyses of all its
+content checks before running them, so they share one pass even on the
+first validation; every path also remembers which analyses have been asked
+of it, so checks spread over several matchers share the pass once a
+changed file is re-read. Results are cached by (device, inode, size,
+mtime), so other checks on the same file, and later calls, are answered from
+the cache.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Set, Union
+
+from .principia import InvalidArgumentError
+
+_CHUNK_SIZE = 4 * 1024 * 1024
+_CACHE_SIZE = 256
+# Analyses read straight from the mapping, without a pass over the file.
+_DIRECT = frozenset({"header", "trailing_newline"})
+
+_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+# Per path, the full-pass analyses its checks have asked for so far.
+_demand: "OrderedDict[str, Set[str]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _file_key(path: Any) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    if not os.path.isfile(path):
+        return None
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _scan(path: Any, size: int, analyses: Set[str]) -> Dict[str, Any]:
+    """Computes `analyses` for the file in a single streaming pass."""
+    results: Dict[str, Any] = {}
+    hashers = {a: hashlib.new(a.split(":", 1)[1]) for a in analyses if a.startswith("checksum:")}
+    want_lines = "lines" in analyses
+    want_jsonl = "jsonl" in analyses
+
+    if size == 0:  # mmap refuses empty files.
+        results.update({"header": b"", "lines": 0, "trailing_newline": False, "jsonl": True})
+        results.update({a: h.hexdigest() for a, h in hashers.items()})
+        return {a: results[a] for a in analyses}
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if "header" in analyses:
+            end = mm.find(b"\n")
+            results["header"] = mm[:end if end != -1 else size].rstrip(b"\r")
+        if "trailing_newline" in analyses:
+            results["trailing_newline"] = mm[size - 1:size] == b"\n"
+
+        if hashers or want_lines or want_jsonl:
+            view = memoryview(mm)
+            try:
+                newlines, well_formed, pending = 0, True, b""
+                for pos in range(0, size, _CHUNK_SIZE):
+                    chunk = view[pos:pos + _CHUNK_SIZE]
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+                    if want_lines or want_jsonl:
+                        data = chunk.tobytes()
+                        newlines += data.count(b"\n")
+                        if want_jsonl and well_formed:
+                            lines = (pending + data).split(b"\n")
+                            pending = lines.pop()
+                            well_formed = all(_is_json(line) for line in lines)
+                    del chunk
+                    if not (well_formed or hashers or want_lines):
+                        break
+                if want_jsonl and well_formed and pending:
+                    well_formed = _is_json(pending)
+            finally:
+                view.release()
+            results["lines"] = newlines + (0 if mm[size - 1:size] == b"\n" else 1)
+            results["jsonl"] = well_formed
+            results.update({a: h.hexdigest() for a, h in hashers.items()})
+
+    return {a: results[a] for a in analyses}
+
+
+def _is_json(line: bytes) -> bool:
+    try:
+        json.loads(line)
+        return True
+    except ValueError:
+        return False
+
+
+def scan_file(path: Any, analyses: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Returns the cached analyses for `path`, computing any of `analyses` that
+    are missing (by default, those already asked of this path). A full pass
+    also computes every other full-pass analysis asked of this path before.
+    Returns None if `path` is not an existing regular file.
+    """
+    key = _file_key(path)
+    if key is None:
+        return None
+    ident = os.path.realpath(os.fspath(path))
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+        demand = _demand.setdefault(ident, set())
+        _demand.move_to_end(ident)
+        requested = set(demand if analyses is None else analyses)
+        demand.update(requested - _DIRECT)
+        full_pass = set(demand)
+        while len(_demand) > _CACHE_SIZE * 4:
+            _demand.popitem(last=False)
+    have = set(cached or ())
+    missing = requested - have
+    if not missing:
+        return cached
+    if missing - _DIRECT:
+        missing |= full_pass - have
+    results = dict(cached or {})
+    results.update(_scan(path, key[2], missing))
+    with _lock:
+        _cache[key] = results
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return results
+
+
+def clear_file_cache() -> None:
+    """Forgets every cached file analysis and which analyses each path needs."""
+    with _lock:
+        _cache.clear()
+        _demand.clear()
+
+
+def _content_check(analysis: str, test: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    def check(path: Any) -> bool:
+        results = scan_file(path, (analysis,))
+        return results is not None and test(results[analysis])
+    # Lets the matcher compute the analyses of all its arms in one pass.
+    check.__principia_prefetch__ = (scan_file, analysis)
+    return check
+
+
+# --- File Content Checks ---
+def have_header(expected: Union[str, Sequence[str]], delimiter: str = ",",
+                encoding: str = "utf-8") -> Callable[[Any], bool]:
+    """
+    Checks the first line of a file. `expected` is either the exact line or
+    a sequence of column names joined by `delimiter`.
+    """
+    line = expected if isinstance(expected, str) else delimiter.join(expected)
+    target = line.encode(encoding)
+    return _content_check("header", lambda header: header == target)
+
+
+def have_line_count(expected: Optional[int] = None, min_lines: Optional[int] = None,
+                    max_lines: Optional[int] = None) -> Callable[[Any], bool]:
+    """Checks the number of lines; a final line without a newline still counts."""
+    if expected is None and min_lines is None and max_lines is None:
+        raise InvalidArgumentError("have_line_count needs expected, min_lines or max_lines.")
+    def test(n: int) -> bool:
+        return ((expected is None or n == expected)
+                and (min_lines is None or n >= min_lines)
+                and (max_lines is None or n <= max_lines))
+    return _content_check("lines", test)
+
+
+def end_with_newline() -> Callable[[Any], bool]:
+    """Checks that a file is non-empty and its last byte is a newline."""
+    return _content_check("trailing_newline", lambda v: v)
+
+
+def have_checksum(hexdigest: str, algorithm: str = "sha256") -> Callable[[Any], bool]:
+    """Checks a file's digest with any algorithm supported by `hashlib`."""
+    hashlib.new(algorithm)  # Fail at contract definition, not on first call.
+    return _content_check(f"checksum:{algorithm}", lambda digest: digest == hexdigest.lower())
+
+
+def be_well_formed_jsonl() -> Callable[[Any], bool]:
+    """Checks that every line of a file is a valid JSON document."""
+    return _content_check("jsonl", lambda v: v)
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+incremental.py: Incremental validation of append-only datasets.
+
+A dataset that only ever grows by appending rows does not need its whole
+history re-validated on every run. `IncrementalMatcher` keeps, per dataset
+key, a watermark (the number of rows already validated) and a mergeable
+summary of each tracked column: count, min/max, running moments, first/last
+value and whether it has been non-decreasing so far.
+
+On each check:
+
+*   Ordinary `.must()` arms run on the whole value, as usual (they should be
+    cheap: types, columns).
+*   `.must_rows()` arms run only on the rows past the watermark.
+*   `.must_summary()` arms run on the summary merged with the new rows, so
+    aggregate predicates cost O(new rows) instead of a rescan.
+
+The stored state only advances once every arm has passed, so rejected rows
+are re-examined next time. If the dataset shrank, or the last validated row
+no longer matches, the history was rewritten and the state is rebuilt.
+
+    SALES_CONTRACT = AssumptionContract(preconditions={
+        'raw_data': IncrementalMatcher(key="sales", columns=["timestamp", "sales"])
+            .must(be_a(pd.DataFrame), InvalidArgumentError, "{name} must be a DataFrame.")
+            .must_rows(lambda rows: rows['sales'].notna().all(), InvalidArgumentError, "{name} has missing sales.")
+            .must_summary(be_monotonic("timestamp"), InvalidArgumentError, "{name} timestamps went backwards.")
+    })
+"""
+
+import copy
+import math
+import os
+import pickle
+import tempfile
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+from .principia import AssuranceMatcher, ConfigurationError, InvalidArgumentError, np
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# ==============================================================================
+# SECTION 1: MERGEABLE SUMMARY STATE
+# ==============================================================================
+
+@dataclass(frozen=True)
+class ColumnSummary:
+    """Summary of one column that can be merged with the summary of later rows."""
+    count: int = 0
+    nan_count: int = 0
+    min: Any = None
+    max: Any = None
+    mean: float = 0.0
+    m2: float = 0.0
+    first: Any = None
+    last: Any = None
+    monotonic: bool = True
+
+    @property
+    def variance(self) -> float:
+        """Population variance of the non-NaN values (NaN for numeric-free columns)."""
+        return self.m2 / self.count if self.count else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance) if self.count else math.nan
+
+    @classmethod
+    def of(cls, values: Any) -> "ColumnSummary":
+        """
+        Summarises a 1-D sequence of values (a column slice). Missing values
+        (NaN, None, NaT, pd.NA) are counted in `nan_count` and otherwise
+        ignored, whatever the dtype.
+        """
+        arr = np.asarray(values)
+        if arr.size == 0:
+            return cls()
+        numeric = arr.dtype.kind in "biuf"
+        valid = arr[~_missing(arr)]
+        nan_count = int(arr.size - valid.size)
+        if valid.size == 0:
+            return cls(nan_count=nan_count)
+        mean = float(valid.mean()) if numeric else 0.0
+        m2 = float(((valid - mean) ** 2).sum()) if numeric else 0.0
+        return cls(
+            count=int(valid.size),
+            nan_count=nan_count,
+            min=valid.min(),
+            max=valid.max(),
+            mean=mean,
+            m2=m2,
+            first=valid[0],
+            last=valid[-1],
+            monotonic=bool(valid.size < 2 or (valid[1:] >= valid[:-1]).all()),
+        )
+
+    def merge(self, later: "ColumnSummary") -> "ColumnSummary":
+        """Combines this summary with that of rows appended after it (Chan et al.)."""
+        if not self.count:
+            return replace(later, nan_count=self.nan_count + later.nan_count)
+        if not later.count:
+            return replace(self, nan_count=self.nan_count + later.nan_count)
+        count = self.count + later.count
+        delta = later.mean - self.mean
+        return ColumnSummary(
+            count=count,
+            nan_count=self.nan_count + later.nan_count,
+            min=min(self.min, later.min),
+            max=max(self.max, later.max),
+            mean=self.mean + delta * later.count / count,
+            m2=self.m2 + later.m2 + delta * delta * self.count * later.count / count,
+            first=self.first,
+            last=later.last,
+            monotonic=self.monotonic and later.monotonic and self.last <= later.first,
+        )
+
+
+@dataclass(frozen=True)
+class DatasetState:
+    """Everything remembered about a dataset between validations."""
+    watermark: int = 0
+    columns: Dict[str, ColumnSummary] = field(default_factory=dict)
+    boundary: Optional[Tuple[Any, ...]] = None
+
+    def extend(self, new_rows: Any, columns: Sequence[str], total_rows: int) -> "DatasetState":
+        merged = {
+            col: self.columns.get(col, ColumnSummary()).merge(ColumnSummary.of(new_rows[col]))
+            for col in columns
+        }
+        boundary = _row_values(new_rows, columns, -1) if len(new_rows) else self.boundary
+        return DatasetState(watermark=total_rows, columns=merged, boundary=boundary)
+
+
+def _missing(arr: Any) -> Any:
+    """Boolean mask of the missing values of a 1-D array, for every dtype kind."""
+    if pd is not None:
+        return np.asarray(pd.isna(arr), dtype=bool)
+    if arr.dtype.kind in "fc":
+        return np.isnan(arr)
+    if arr.dtype.kind in "mM":
+        return np.isnat(arr)
+    if arr.dtype.kind == "O":
+        return np.fromiter((v is None or v != v for v in arr), dtype=bool, count=arr.size)
+    return np.zeros(arr.shape, dtype=bool)
+
+
+def _row_values(data: Any, columns: Sequence[str], position: int) -> Tuple[Any, ...]:
+    row = data.iloc[position]
+    return tuple(row[col] for col in columns)
+
+
+def _is_missing_scalar(v: Any) -> bool:
+    if pd is not None:
+        try:
+            return bool(pd.isna(v))
+        except (TypeError, ValueError):
+            return False
+    return v is None or (isinstance(v, float) and math.isnan(v))
+
+
+def _same_row(a: Tuple[Any, ...], b: Tuple[Any, ...]) -> bool:
+    # NaN != NaN (likewise NaT, pd.NA), so compare those positions by missingness instead.
+    def same(x: Any, y: Any) -> bool:
+        if _is_missing_scalar(x) or _is_missing_scalar(y):
+            return _is_missing_scalar(x) and _is_missing_scalar(y)
+        return bool(x == y)
+    return len(a) == len(b) and all(same(x, y) for x, y in zip(a, b))
+
+
+# --- Summary Checks ---
+def be_monotonic(column: str) -> Callable[[DatasetState], bool]:
+    """Checks that a column has never decreased, across every validated batch."""
+    return lambda state: state.columns[column].monotonic
+
+def have_row_count(min_rows: int) -> Callable[[DatasetState], bool]:
+    return lambda state: state.watermark >= min_rows
+
+
+# ==============================================================================
+# SECTION 2: STATE STORES
+# ==============================================================================
+
+class InMemoryStateStore:
+    """Keeps dataset state for the lifetime of the process."""
+    def __init__(self):
+        self._states: Dict[str, DatasetState] = {}
+        self._lock = threading.Lock()
+
+    def load(self, key: str) -> Optional[DatasetState]:
+        return self._states.get(key)
+
+    def save(self, key: str, state: DatasetState) -> None:
+        with self._lock:
+            self._states[key] = state
+
+    def reset(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._states.clear()
+            else:
+                self._states.pop(key, None)
+
+
+class FileStateStore(InMemoryStateStore):
+    """Persists dataset state as one pickle per key under `directory`, across runs."""
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in key)
+        return os.path.join(self.directory, f"{safe}.state")
+
+    def load(self, key: str) -> Optional[DatasetState]:
+        state = super().load(key)
+        if state is None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    state = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                return None
+            super().save(key, state)
+        return state
+
+    def save(self, key: str, state: DatasetState) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        super().save(key, state)
+
+    def reset(self, key: Optional[str] = None) -> None:
+        keys = [key] if key is not None else list(self._states)
+        super().reset(key)
+        for k in keys:
+            try:
+                os.remove(self._path(k))
+            except OSError:
+                pass
+
+
+_default_store = InMemoryStateStore()
+
+
+# ==============================================================================
+# SECTION 3: THE INCREMENTAL MATCHER
+# ==============================================================================
+
+class IncrementalMatcher(AssuranceMatcher):
+    """
+    An AssuranceMatcher for append-only, DataFrame-like values (anything with
+    `len`, `.iloc` and column access). `key` identifies the dataset, either
+    as a fixed string or as a function of the value; `columns` are the
+    columns whose summaries are tracked.
+    """
+    def __init__(
+        self,
+        value: Any = None,
+        name: str = "Value",
+        key: Union[str, Callable[[Any], str]] = None,
+        columns: Sequence[str] = (),
+        store: Optional[InMemoryStateStore] = None
+    ):
+        if np is None:
+            raise ConfigurationError("IncrementalMatcher requires numpy.")
+        super().__init__(value, name)
+        self._key = key
+        self._columns = list(columns)
+        self._store = store if store is not None else _default_store
+        self._row_arms = AssuranceMatcher(None, name)
+        self._summary_arms = AssuranceMatcher(None, name)
+
+    def must_rows(self, success_condition: Callable[[Any], bool], then_raise: type,
+                  message: str, **kwargs: Any) -> "IncrementalMatcher":
+        """Defines an arm evaluated only on the rows appended since the last check."""
+        self._row_arms.must(success_condition, then_raise, message, **kwargs)
+        return self
+
+    def must_summary(self, success_condition: Callable[[DatasetState], bool], then_raise: type,
+                     message: str, **kwargs: Any) -> "IncrementalMatcher":
+        """Defines an arm evaluated on the DatasetState merged with the new rows."""
+        self._summary_arms.must(success_condition, then_raise, message, **kwargs)
+        return self
+
+    def _bind(self, value: Any, name: str) -> "IncrementalMatcher":
+        bound = copy.copy(self)
+        bound._value = value
+        bound._name = name
+        return bound
+
+    def state(self, value: Any = None) -> Optional[DatasetState]:
+        """Returns the stored state for this matcher's dataset key."""
+        return self._store.load(self._resolve_key(self._value if value is None else value))
+
+    def _resolve_key(self, value: Any) -> str:
+        if self._key is None:
+            raise InvalidArgumentError("IncrementalMatcher needs a dataset key.")
+        return self._key if isinstance(self._key, str) else self._key(value)
+
+    def check(self, deadline: Optional[float] = None, on_timeout: str = "fail") -> Any:
+        super().check(deadline, on_timeout)
+        data = self._value
+        key = self._resolve_key(data)
+        state = self._store.load(key) or DatasetState()
+        total = len(data)
+
+        if total < state.watermark or (
+            state.watermark and state.boundary is not None
+            and not _same_row(_row_values(data, self._columns, state.watermark - 1), state.boundary)
+        ):
+            state = DatasetState()
+
+        new_rows = data.iloc[state.watermark:]
+        try:
+            candidate = state.extend(new_rows, self._columns, total)
+        except Exception as e:
+            # E.g. values of a tracked column that cannot be ordered; the rows
+            # are rejected like any other failed arm, and the state is kept.
+            raise InvalidArgumentError(f"{self._name}: cannot summarise the new rows ({e!r}).") from e
+
+        self._row_arms._bind(new_rows, self._name).check(deadline, on_timeout)
+        self._summary_arms._bind(candidate, self._name).check(deadline, on_timeout)
+        self._store.save(key, candidate)
+        return data
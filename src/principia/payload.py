@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+payload.py: Parse-once and streaming checks for JSON payloads.
+
+Arms such as `lambda r: "bitcoin" in r.json()` parse the whole response body
+again in every arm that looks at it. This module offers two alternatives:
+
+1.  `json_body(value)` parses a response (anything with `.json()`), bytes or
+    str at most once and hands every later caller the same object, so a
+    contract pays for one parse no matter how many arms inspect the body.
+
+2.  `have_json_keys(required)` does not parse at all. It scans the raw bytes
+    of a JSON object incrementally, checks the type of each required
+    top-level key from the token of its value, skips everything else
+    without building Python objects, and stops reading once the value of
+    the last required key is complete (or as soon as one cannot match). On a streamed `requests` response (`stream=True`) the
+    rest of the body is not downloaded by the check; the bytes it did read
+    are put back in front of the unread stream, so the caller still gets a
+    complete response.
+
+Both modes agree on types: `int` means a JSON number without a fraction or
+exponent, `float` one with either, and `bool` is never an `int`.
+"""
+
+import json
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .principia import InvalidArgumentError
+
+# ==============================================================================
+# SECTION 1: PARSE-ONCE BODIES
+# ==============================================================================
+
+_weak_bodies: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+# For values that cannot be weakly referenced (bytes, str): a small LRU keyed
+# by id, holding the value itself so the id cannot be reused while cached.
+_recent_bodies: "OrderedDict[int, Tuple[Any, Any]]" = OrderedDict()
+_RECENT_SIZE = 16
+_lock = threading.Lock()
+
+
+def _parse(value: Any) -> Any:
+    if hasattr(value, "json"):
+        return value.json()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return json.loads(bytes(value))
+    if isinstance(value, str):
+        return json.loads(value)
+    raise TypeError(f"Cannot parse a JSON body from {type(value).__name__}.")
+
+
+def json_body(value: Any) -> Any:
+    """
+    Returns the parsed JSON body of `value`, parsing it only the first time.
+    Parse errors propagate, which an arm reports as a failed check.
+    """
+    try:
+        return _weak_bodies[value]
+    except (KeyError, TypeError):
+        pass
+    with _lock:
+        entry = _recent_bodies.get(id(value))
+        if entry is not None and entry[0] is value:
+            return entry[1]
+    parsed = _parse(value)
+    try:
+        _weak_bodies[value] = parsed
+    except TypeError:
+        with _lock:
+            _recent_bodies[id(value)] = (value, parsed)
+            while len(_recent_bodies) > _RECENT_SIZE:
+                _recent_bodies.popitem(last=False)
+    return parsed
+
+
+# ==============================================================================
+# SECTION 2: STREAMING KEY/TYPE SCANNER
+# ==============================================================================
+
+_JSON_KINDS = {
+    dict: "object", list: "array", str: "string", int: "integer",
+    float: "float", bool: "boolean", type(None): "null",
+}
+# Numbers are "integer" or "float" depending on the rest of the token.
+_KIND_OF_FIRST_BYTE = {
+    ord("{"): "object", ord("["): "array", ord('"'): "string", ord("t"): "boolean",
+    ord("f"): "boolean", ord("n"): "null", ord("-"): "number",
+    **{ord(d): "number" for d in "0123456789"},
+}
+
+
+def _kind_of(value: Any) -> Optional[str]:
+    """The JSON kind of a parsed value, as the scanner would classify its token."""
+    # bool before int: True is an int to isinstance, but not to JSON.
+    for python_type in (bool, int, float, str, dict, list, type(None)):
+        if isinstance(value, python_type):
+            return _JSON_KINDS[python_type]
+    return None
+
+
+_WHITESPACE = b" \t\r\n"
+_CONTAINER_TOKEN = re.compile(rb'[\[\]{}"]')
+_SCALAR_END = re.compile(rb"[,}\]\s]")
+_SCALAR_TOKEN = re.compile(rb"true|false|null|-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?")
+
+
+class _MalformedJSON(Exception):
+    pass
+
+
+class _Reader:
+    """A byte cursor over an iterable of chunks that only pulls what it needs."""
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self.buf = b""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        for chunk in self._chunks:
+            if chunk:
+                self.buf = self.buf[self.pos:] + bytes(chunk)
+                self.pos = 0
+                return True
+        return False
+
+    def next_token(self) -> int:
+        """Returns the next non-whitespace byte without consuming it."""
+        while True:
+            while self.pos < len(self.buf):
+                if self.buf[self.pos] not in _WHITESPACE:
+                    return self.buf[self.pos]
+                self.pos += 1
+            if not self._fill():
+                raise _MalformedJSON("unexpected end of input")
+
+    def expect(self, byte: bytes) -> None:
+        if self.next_token() != byte[0]:
+            raise _MalformedJSON(f"expected {byte!r}")
+        self.pos += 1
+
+    def read_string(self) -> bytes:
+        """Consumes a string (opening quote already current) and returns its raw contents."""
+        self.expect(b'"')
+        start = search = self.pos
+        while True:
+            end = self.buf.find(b'"', search)
+            if end == -1:
+                # _fill drops everything before self.pos (== start) from the buffer.
+                search = len(self.buf) - start
+                if not self._fill():
+                    raise _MalformedJSON("unterminated string")
+                start = 0
+                continue
+            backslashes = 0
+            while end - 1 - backslashes >= start and self.buf[end - 1 - backslashes] == 0x5C:
+                backslashes += 1
+            if backslashes % 2:
+                search = end + 1
+                continue
+            raw = self.buf[start:end]
+            self.pos = end + 1
+            return raw
+
+    def skip_value(self) -> None:
+        first = self.next_token()
+        if first == ord('"'):
+            self.read_string()
+        elif first in (ord("{"), ord("[")):
+            self._skip_container()
+        else:
+            self.read_scalar()
+
+    def _skip_container(self) -> None:
+        depth = 0
+        while True:
+            match = _CONTAINER_TOKEN.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise _MalformedJSON("unterminated container")
+                continue
+            token = match.group()
+            if token == b'"':
+                self.pos = match.start()
+                self.read_string()
+                continue
+            self.pos = match.end()
+            depth += 1 if token in (b"{", b"[") else -1
+            if depth == 0:
+                return
+
+    def read_scalar(self) -> bytes:
+        """Consumes a number, true, false or null and returns its token."""
+        token = b""
+        start = self.pos
+        while True:
+            match = _SCALAR_END.search(self.buf, self.pos)
+            if match is not None:
+                self.pos = match.start()
+                token += self.buf[start:self.pos]
+                if not _SCALAR_TOKEN.fullmatch(token):
+                    raise _MalformedJSON(f"invalid value {token!r}")
+                return token
+            token += self.buf[start:]
+            self.pos = len(self.buf)
+            if not self._fill():
+                raise _MalformedJSON("unexpected end of input")
+            start = self.pos
+
+
+class _RewoundRaw:
+    """
+    Stands in for a streamed response's `raw`: replays the chunks a check
+    consumed, then continues with the rest of the body. Everything else is
+    delegated to the original object.
+    """
+    def __init__(self, raw: Any, consumed: List[bytes], rest: Iterator[bytes]):
+        self._raw = raw
+        self._chunks = _chain(consumed, rest)
+        self._pending = b""
+
+    def stream(self, amt: Optional[int] = None, decode_content: bool = True) -> Iterator[bytes]:
+        if self._pending:
+            chunk, self._pending = self._pending, b""
+            yield chunk
+        yield from self._chunks
+
+    def read(self, amt: Optional[int] = None, *args: Any, **kwargs: Any) -> bytes:
+        data = self._pending
+        while amt is None or len(data) < amt:
+            chunk = next(self._chunks, b"")
+            if not chunk:
+                break
+            data += chunk
+        if amt is None:
+            self._pending = b""
+            return data
+        data, self._pending = data[:amt], data[amt:]
+        return data
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+
+def _chain(consumed: List[bytes], rest: Iterator[bytes]) -> Iterator[bytes]:
+    yield from consumed
+    yield from rest
+
+
+def _open_source(value: Any, chunk_size: int) -> Tuple[Iterable[bytes], Optional[Callable[[], None]]]:
+    """
+    Returns the chunks of `value` and a callback that puts back whatever was
+    read from it, so a check never consumes the value it passes on.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        view = memoryview(value)
+        return (view[i:i + chunk_size] for i in range(0, len(view), chunk_size)), None
+    if isinstance(value, str):
+        return _open_source(value.encode("utf-8"), chunk_size)
+    if hasattr(value, "iter_content"):
+        # A requests.Response: read what is already buffered, or stream it.
+        if getattr(value, "_content_consumed", False):
+            return _open_source(value.content, chunk_size)
+        body = value.iter_content(chunk_size)
+        consumed: List[bytes] = []
+        def chunks() -> Iterator[bytes]:
+            for chunk in body:
+                consumed.append(chunk)
+                yield chunk
+        def restore() -> None:
+            value.raw = _RewoundRaw(value.raw, consumed, body)
+        return chunks(), restore
+    if hasattr(value, "read"):
+        if not (hasattr(value, "seekable") and value.seekable()):
+            raise InvalidArgumentError("Streaming JSON checks need a seekable file-like object.")
+        position = value.tell()
+        return iter(lambda: value.read(chunk_size), b""), lambda: value.seek(position)
+    if iter(value) is value:
+        raise InvalidArgumentError("Streaming JSON checks cannot rewind an iterator; pass a list of chunks.")
+    return value, None
+
+
+def _kinds(expected: Any) -> Optional[Tuple[str, ...]]:
+    if expected is None:
+        return None
+    types = expected if isinstance(expected, tuple) else (expected,)
+    unknown = [t for t in types if t not in _JSON_KINDS]
+    if unknown:
+        raise InvalidArgumentError(f"{unknown} are not JSON types; use dict, list, str, int, float, bool or type(None).")
+    return tuple(_JSON_KINDS[t] for t in types)
+
+
+def _required_kinds(required: Union[Sequence[str], Dict[str, Any]]) -> Dict[str, Optional[Tuple[str, ...]]]:
+    if not isinstance(required, dict):
+        return {key: None for key in required}
+    return {key: _kinds(expected) for key, expected in required.items()}
+
+
+def scan_json_keys(value: Any, required: Union[Sequence[str], Dict[str, Any]], chunk_size: int = 64 * 1024) -> bool:
+    """
+    Scans a JSON object for `required` top-level keys without parsing it.
+    `required` is a sequence of keys, or a mapping of key to an expected
+    Python type (dict, list, str, int, float, bool, type(None), a tuple of
+    these, or None for any). Returns as soon as every required key has been
+    seen with the right type, or as soon as one cannot be satisfied.
+
+    Whatever was read is put back: a streamed response is left with its
+    body intact and a seekable file at its original position. Iterators
+    and unseekable files cannot be rewound and raise InvalidArgumentError.
+    """
+    pending = _required_kinds(required)
+    if not pending:
+        return True
+    return _scan(value, pending, chunk_size)
+
+
+def _scan(value: Any, pending: Dict[str, Optional[Tuple[str, ...]]], chunk_size: int) -> bool:
+    chunks, restore = _open_source(value, chunk_size)
+    try:
+        return _scan_object(_Reader(chunks), pending)
+    finally:
+        if restore is not None:
+            restore()
+
+
+def _scan_object(reader: _Reader, pending: Dict[str, Optional[Tuple[str, ...]]]) -> bool:
+    try:
+        reader.expect(b"{")
+        if reader.next_token() == ord("}"):
+            return False
+        while True:
+            raw_key = reader.read_string()
+            key = json.loads(b'"' + raw_key + b'"') if b"\\" in raw_key else raw_key.decode("utf-8")
+            reader.expect(b":")
+            matched = key in pending
+            if matched:
+                kinds = pending.pop(key)
+                kind = _KIND_OF_FIRST_BYTE.get(reader.next_token())
+                if kind == "number":
+                    token = reader.read_scalar()
+                    kind = "float" if any(c in token for c in b".eE") else "integer"
+                else:
+                    reader.skip_value()
+                if kind is None or (kinds is not None and kind not in kinds):
+                    return False
+            else:
+                reader.skip_value()
+            # The verdict is only final once the value is known to be complete.
+            token = reader.next_token()
+            reader.pos += 1
+            if token not in (ord(","), ord("}")):
+                return False
+            if matched and not pending:
+                return True
+            if token == ord("}"):
+                return False
+    except (_MalformedJSON, ValueError):
+        return False
+
+
+# --- Payload Checks ---
+def have_json_keys(required: Union[Sequence[str], Dict[str, Any]], chunk_size: int = 64 * 1024) -> Callable[[Any], bool]:
+    """
+    Checks that a JSON object (bytes, str, seekable file, list of chunks or a
+    `requests` response) has the required top-level keys and value types,
+    reading only as much of it as needed. See `scan_json_keys`.
+    """
+    pending = _required_kinds(required)  # Fail at contract definition, not on first call.
+    return lambda v: not pending or _scan(v, dict(pending), chunk_size)
+
+
+def have_json_key(key: str, expected_type: Any = None) -> Callable[[Any], bool]:
+    """
+    Checks a top-level key of the parsed body, sharing one parse across arms
+    (see `json_body`). Types are matched as `have_json_keys` matches them.
+    """
+    kinds = _kinds(expected_type)
+    def check(v: Any) -> bool:
+        body = json_body(v)
+        return isinstance(body, dict) and key in body and (
+            kinds is None or _kind_of(body[key]) in kinds)
+    return check
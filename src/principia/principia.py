@@ -23,16 +23,30 @@ The library is layered, offering tools of increasing abstraction:
     direct, inline validation when a full contract is not necessary.
 """
 
+import asyncio
+import atexit
 import builtins
+import concurrent.futures
 import functools
 import inspect
+import math
 import os
+import queue
+import random
 import re
+import threading
+import time
+import weakref
 from collections.abc import Callable, Sequence
 from dataclasses import dataclass, field
 from io import TextIOBase
-from typing import Any, Dict, List, Type, Union
+from typing import Any, Dict, List, NamedTuple, Optional, TextIO, Tuple, Type, Union
 import sys
+
+try:
+    import numpy as np
+except ImportError:  # The array-aware checks degrade to scalar-only.
+    np = None
 # ==============================================================================
 # SECTION 1: CUSTOM EXCEPTION TAXONOMY
 # A clear hierarchy of exceptions for specific failure consequences.
@@ -68,12 +82,63 @@ class ConfigurationError(PrincipiaError):
     """Raised when an environmental or configuration-related issue is detected."""
     pass
 
+class PreflightError(ConfigurationError):
+    """
+    Raised by `preflight()` when one or more environment checks fail. The
+    `report` attribute holds every failure, not just the first.
+    """
+    def __init__(self, message: str, report: Any = None):
+        super().__init__(message)
+        self.report = report
+
+class CheckTimeoutError(PrincipiaError, TimeoutError):
+    """
+    Raised when an arm, or a contract as a whole, exceeds its time budget and
+    the contract's `on_timeout` policy is "fail". Inherits from TimeoutError.
+    """
+    pass
+
 
 # ==============================================================================
 # SECTION 2: THE Principia ENGINE (DECLARATIVE CONTRACTS)
 # The highest level of abstraction for applying contracts to functions.
 # ==============================================================================
 
+class Arm(NamedTuple):
+    """
+    A single condition of an AssuranceMatcher and its consequence.
+    `predicate` is the function the arm was defined with; `must()` wraps it
+    in a negating `failure_condition`, marked by `negated`.
+    """
+    failure_condition: Callable[[Any], Any]
+    then_raise: Type[BaseException]
+    message: str
+    timeout: Optional[float] = None
+    is_async: bool = False
+    priority: Optional[str] = None
+    predicate: Optional[Callable[[Any], Any]] = None
+    negated: bool = False
+
+    @property
+    def identity(self) -> Tuple[Callable[[Any], Any], bool]:
+        """What the arm checks, independent of the matcher it was defined on."""
+        return (self.failure_condition if self.predicate is None else self.predicate, self.negated)
+
+
+_TIMEOUT_POLICIES = ("fail", "pass", "cached")
+
+# Priorities for the LoadGovernor, from never shed to shed first.
+PRIORITIES = ("critical", "normal", "optional")
+
+
+def _validate_priority(priority: Optional[str]) -> None:
+    if priority is not None and priority not in PRIORITIES:
+        raise InvalidArgumentError(f"priority must be one of {PRIORITIES}, not {priority!r}.")
+
+# The last verdict of every arm run under a time budget, for on_timeout="cached".
+_last_verdicts: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
 class AssuranceMatcher:
     """
     Emulates Rust's `match` syntax for expressive, chainable validation.
@@ -82,79 +147,538 @@ class AssuranceMatcher:
     a series of conditions, raising a specific consequence for the first
     condition that fails.
     """
+    # Set on a bound matcher once an on_timeout policy has decided an arm.
+    _timed_out = False
+    # Set once an arm's predicate declares shared work (see `_prefetch`).
+    _prefetch = False
+
     def __init__(self, value: Any, name: str = "Value"):
         self._value = value
         self._name = name
-        self._arms: List[tuple] = []
+        self._arms: List[Arm] = []
 
     def must(
         self,
         success_condition: Callable[[Any], bool],
         then_raise: Type[BaseException],
-        message: str
+        message: str,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
     ) -> "AssuranceMatcher":
         """
         Defines an arm that requires a condition to be TRUE for success.
         This is the preferred, readable way to build contracts.
+
+        `timeout` bounds the arm's run time in seconds; see `check`. The
+        condition may be a coroutine function. `priority` ("critical",
+        "normal" or "optional") overrides the contract's priority for the
+        LoadGovernor; by default the arm inherits it.
         """
+        _validate_priority(priority)
+        self._prefetch = self._prefetch or hasattr(success_condition, "__principia_prefetch__")
         # Invert the success condition to create the internal failure condition.
-        failure_condition = lambda v: not success_condition(v)
-        self._arms.append((failure_condition, then_raise, message))
+        if inspect.iscoroutinefunction(success_condition):
+            async def failure_condition(v):
+                return not await success_condition(v)
+            self._arms.append(Arm(failure_condition, then_raise, message, timeout, True, priority,
+                                  success_condition, True))
+        else:
+            failure_condition = lambda v: not success_condition(v)
+            if getattr(success_condition, "__principia_elementwise__", False):
+                failure_condition.__principia_elementwise__ = True
+            self._arms.append(Arm(failure_condition, then_raise, message, timeout, False, priority,
+                                  success_condition, True))
         return self
 
     def on(
         self,
         failure_condition: Callable[[Any], bool],
         then_raise: Type[BaseException],
-        message: str
+        message: str,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None
     ) -> "AssuranceMatcher":
         """
         Defines an arm based on a condition that returns TRUE for failure.
         Useful for low-level or inverted logic checks.
         """
-        self._arms.append((failure_condition, then_raise, message))
+        _validate_priority(priority)
+        self._prefetch = self._prefetch or hasattr(failure_condition, "__principia_prefetch__")
+        is_async = inspect.iscoroutinefunction(failure_condition)
+        self._arms.append(Arm(failure_condition, then_raise, message, timeout, is_async, priority,
+                              failure_condition, False))
         return self
 
-    def check(self) -> Any:
+    def check(self, deadline: Optional[float] = None, on_timeout: str = "fail") -> Any:
         """
         Executes the validation, raising the first matching consequence.
         Returns the original value if all checks pass.
+
+        Without a `deadline` (a `time.monotonic()` value), sync arms without
+        a `timeout` run inline. Otherwise sync arms run on a pooled worker
+        thread, bounded by the smaller of their timeout and the time left
+        before the deadline; consecutive arms without a timeout share one
+        hand-off. Async arms run as cancellable tasks under the same bound.
+        A worker that overruns is abandoned, and while it is still running
+        its arm is not started again but treated as timed out.
+
+        If a budget runs out, `on_timeout` decides the outcome: "fail" raises
+        CheckTimeoutError, "pass" treats the arm as passed, and "cached"
+        reuses the arm's last verdict (failing if there is none). An
+        exception raised by the arm itself, including a TimeoutError of its
+        own, is always a failure of the arm.
+        """
+        if self._prefetch:
+            _prefetch(self._arms, self._value)
+        arms = self._arms
+        i = 0
+        while i < len(arms):
+            arm = arms[i]
+            if arm.is_async:
+                budget = _arm_budget(arm, deadline)
+                try:
+                    if budget is not None and budget <= 0:
+                        raise _BudgetExhausted()
+                    is_failure_match = _run_async_arm(arm, self._value, budget)
+                except _BudgetExhausted:
+                    is_failure_match = self._on_timeout(arm, budget, on_timeout)
+                except Exception:
+                    is_failure_match = True
+                else:
+                    if budget is not None:
+                        _last_verdicts[arm.failure_condition] = bool(is_failure_match)
+                if is_failure_match:
+                    self._raise(arm)
+                i += 1
+            elif deadline is None and arm.timeout is None:
+                try:
+                    is_failure_match = arm.failure_condition(self._value)
+                except Exception:
+                    # A failure occurs if the failure condition returns True.
+                    # If the check itself raises an exception (e.g., TypeError during
+                    # a comparison), we treat that as a failure of the check itself.
+                    is_failure_match = True
+                if is_failure_match:
+                    self._raise(arm)
+                i += 1
+            else:
+                budget = _arm_budget(arm, deadline)
+                run = _SyncRun(arms[i:_sync_run_end(arms, i)], self._value)
+                future = run.start(budget)
+                finished = future is not None and bool(concurrent.futures.wait([future], budget)[0])
+                i = self._settle(run, run.finish(future, finished), i, budget, on_timeout)
+        return self._value
+
+    async def acheck(self, deadline: Optional[float] = None, on_timeout: str = "fail") -> Any:
+        """The awaitable form of `check`, for use inside a running event loop."""
+        if self._prefetch:
+            _prefetch(self._arms, self._value)
+        arms = self._arms
+        i = 0
+        while i < len(arms):
+            arm = arms[i]
+            if arm.is_async:
+                budget = _arm_budget(arm, deadline)
+                try:
+                    if budget is not None and budget <= 0:
+                        raise _BudgetExhausted()
+                    is_failure_match = await _await_arm(asyncio.ensure_future(arm.failure_condition(self._value)), budget)
+                except _BudgetExhausted:
+                    is_failure_match = self._on_timeout(arm, budget, on_timeout)
+                except Exception:
+                    is_failure_match = True
+                else:
+                    if budget is not None:
+                        _last_verdicts[arm.failure_condition] = bool(is_failure_match)
+                if is_failure_match:
+                    self._raise(arm)
+                i += 1
+            elif deadline is None and arm.timeout is None:
+                try:
+                    is_failure_match = arm.failure_condition(self._value)
+                except Exception:
+                    is_failure_match = True
+                if is_failure_match:
+                    self._raise(arm)
+                i += 1
+            else:
+                budget = _arm_budget(arm, deadline)
+                run = _SyncRun(arms[i:_sync_run_end(arms, i)], self._value)
+                future = run.start(budget)
+                finished = False
+                if future is not None:
+                    done, _ = await asyncio.wait({asyncio.wrap_future(future)}, timeout=budget)
+                    finished = bool(done)
+                i = self._settle(run, run.finish(future, finished), i, budget, on_timeout)
+        return self._value
+
+    def _settle(self, run: "_SyncRun", verdicts: List[bool], index: int,
+                budget: Optional[float], on_timeout: str) -> int:
+        """Applies a run's verdicts in order and returns the index of the next arm to check."""
+        for arm, failed in zip(run.arms, verdicts):
+            if budget is not None:
+                _last_verdicts[arm.failure_condition] = failed
+            if failed:
+                self._raise(arm)
+        if len(verdicts) == len(run.arms):
+            return index + len(verdicts)
+        # The next arm overran the budget, or was skipped because an earlier
+        # run of it is still hung.
+        arm = run.arms[len(verdicts)]
+        if self._on_timeout(arm, budget, on_timeout):
+            self._raise(arm)
+        return index + len(verdicts) + 1
+
+    def _bind(self, value: Any, name: str) -> "AssuranceMatcher":
+        """
+        Returns a matcher with this one's arms, bound to a concrete value.
+        `contract` calls this on its templates; subclasses that carry extra
+        configuration override it to copy that too.
         """
-        for condition_func, error_cls, msg_template in self._arms:
-            is_failure_match = False
+        bound = self.__class__(value, name=name)
+        bound._arms = self._arms
+        bound._prefetch = self._prefetch
+        return bound
+
+    def _on_timeout(self, arm: Arm, budget: Optional[float], on_timeout: str) -> bool:
+        self._timed_out = True
+        if on_timeout == "pass":
+            return False
+        if on_timeout == "cached" and arm.failure_condition in _last_verdicts:
+            return _last_verdicts[arm.failure_condition]
+        raise CheckTimeoutError(
+            f"{self._name}: check {arm.message!r} did not finish within its {max(budget or 0, 0):.3g}s budget."
+        )
+
+    def _raise(self, arm: Arm) -> None:
+        formatted_message = arm.message.format(
+            value=repr(self._value),
+            name=self._name
+        )
+        raise arm.then_raise(formatted_message)
+
+
+def _prefetch(arms: List[Arm], value: Any) -> None:
+    """
+    Runs shared work for several arms once, before any of them. A predicate
+    declares it as `__principia_prefetch__ = (function, token)`; each
+    function is called once with the value and the tokens of every arm
+    that names it (e.g. the file analyses of all content checks on a path,
+    computed in one pass).
+    """
+    groups: Dict[Callable, set] = {}
+    for arm in arms:
+        hook = getattr(arm.predicate, "__principia_prefetch__", None)
+        if hook is not None:
+            groups.setdefault(hook[0], set()).add(hook[1])
+    for function, tokens in groups.items():
+        try:
+            function(value, tokens)
+        except Exception:
+            pass  # The arms themselves report the failure.
+
+
+def _arm_budget(arm: Arm, deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return arm.timeout
+    remaining = deadline - time.monotonic()
+    return remaining if arm.timeout is None else min(arm.timeout, remaining)
+
+
+_WORKER_IDLE_SECONDS = 60.0
+
+
+class _ArmWorkers:
+    """
+    Daemon threads for sync arms, reused across calls so that a budgeted
+    check costs a hand-off rather than a thread start. A thread is started
+    only when none is idle; idle threads exit after a minute. Threads that
+    overrun are abandoned rather than killed, and never block exit.
+    """
+    def __init__(self):
+        self._tasks: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._idle = 0
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+
+    def submit(self, fn: Callable[[Any], Any], arg: Any) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads do not survive a fork; neither does their queue.
+                self._tasks = queue.SimpleQueue()
+                self._idle = 0
+                self._pid = os.getpid()
+            tasks = self._tasks
+            spawn = self._idle == 0
+            if not spawn:
+                self._idle -= 1
+        tasks.put((future, fn, arg))
+        if spawn:
+            threading.Thread(target=self._work, args=(tasks,), name="principia-arm", daemon=True).start()
+        return future
+
+    def _work(self, tasks: "queue.SimpleQueue") -> None:
+        while True:
             try:
-                # A failure occurs if the failure condition returns True.
-                # If the check itself raises an exception (e.g., TypeError during
-                # a comparison), we treat that as a failure of the check itself.
-                is_failure_match = condition_func(self._value)
+                future, fn, arg = tasks.get(timeout=_WORKER_IDLE_SECONDS)
+            except queue.Empty:
+                with self._lock:
+                    if tasks is not self._tasks:
+                        return
+                    # Only leave while no submitter is counting on this thread.
+                    if self._idle > 0 and tasks.empty():
+                        self._idle -= 1
+                        return
+                continue
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(arg))
+                except BaseException as e:
+                    future.set_exception(e)
+            del future, fn, arg  # Do not keep the checked value alive while idle.
+            with self._lock:
+                if tasks is not self._tasks:
+                    return
+                self._idle += 1
+
+
+_arm_workers = _ArmWorkers()
+
+
+def _start_arm_thread(condition: Callable[[Any], Any], value: Any) -> concurrent.futures.Future:
+    """Runs a sync condition on a pooled daemon thread and returns its Future."""
+    return _arm_workers.submit(condition, value)
+
+
+# failure_condition -> number of abandoned workers still running it. While an
+# arm is hung (e.g. on a dead endpoint) it is not started again, so a busy
+# service does not pile up one hung thread per call.
+_abandoned: Dict[Callable[[Any], Any], int] = {}
+_abandoned_lock = threading.Lock()
+
+
+def _abandon(condition: Callable[[Any], Any], future: concurrent.futures.Future) -> None:
+    with _abandoned_lock:
+        _abandoned[condition] = _abandoned.get(condition, 0) + 1
+    def release(_: Any) -> None:
+        with _abandoned_lock:
+            if _abandoned.get(condition, 0) <= 1:
+                _abandoned.pop(condition, None)
+            else:
+                _abandoned[condition] -= 1
+    future.add_done_callback(release)
+
+
+def _sync_run_end(arms: List[Arm], start: int) -> int:
+    """End of the run of sync arms starting at `start` that can share one worker hand-off."""
+    end = start + 1
+    if arms[start].timeout is None:
+        while end < len(arms) and arms[end].timeout is None and not arms[end].is_async:
+            end += 1
+    return end
+
+
+class _SyncRun:
+    """
+    Consecutive sync arms evaluated in order on one pooled worker, stopping
+    at the first failure. The caller waits for it within the budget; the
+    verdicts reached so far tell which arm was still running if it overran.
+    """
+    __slots__ = ("arms", "value", "verdicts", "stopped")
+
+    def __init__(self, arms: List[Arm], value: Any):
+        self.arms = arms
+        self.value = value
+        self.verdicts: List[bool] = []
+        self.stopped = False
+
+    def __call__(self, _: Any) -> None:
+        for arm in self.arms:
+            if self.stopped or arm.failure_condition in _abandoned:
+                return
+            try:
+                failed = bool(arm.failure_condition(self.value))
             except Exception:
-                is_failure_match = True
-
-            if is_failure_match:
-                formatted_message = msg_template.format(
-                    value=repr(self._value),
-                    name=self._name
-                )
-                raise error_cls(formatted_message)
-        return self._value
+                failed = True
+            self.verdicts.append(failed)
+            if failed:
+                return
+
+    def start(self, budget: Optional[float]) -> Optional[concurrent.futures.Future]:
+        if (budget is not None and budget <= 0) or self.arms[0].failure_condition in _abandoned:
+            return None
+        return _start_arm_thread(self, None)
+
+    def finish(self, future: Optional[concurrent.futures.Future], finished: bool) -> List[bool]:
+        """Returns the verdicts reached; if the run overran, abandons the arm it is stuck in."""
+        if finished:
+            return self.verdicts
+        self.stopped = True
+        verdicts = list(self.verdicts)
+        if future is not None and len(verdicts) < len(self.arms):
+            _abandon(self.arms[len(verdicts)].failure_condition, future)
+        return verdicts
+
+
+class _BudgetExhausted(Exception):
+    """
+    Internal signal that an arm did not finish within its budget. Distinct
+    from TimeoutError, which the arm itself may raise (e.g. a socket
+    timeout) and which must count as the arm failing.
+    """
+
+
+async def _await_arm(task: "asyncio.Future", budget: Optional[float]) -> Any:
+    """Waits for an arm's task; an overrun is decided by whether it finished, not by what it raised."""
+    done, _ = await asyncio.wait({task}, timeout=budget)
+    if not done:
+        task.cancel()
+        raise _BudgetExhausted()
+    return task.result()
+
+
+def _run_async_arm(arm: Arm, value: Any, budget: Optional[float]) -> Any:
+    """Evaluates an async arm from sync code within `budget` seconds, raising _BudgetExhausted if it overruns."""
+    async def bounded():
+        return await _await_arm(asyncio.ensure_future(arm.failure_condition(value)), budget)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(bounded())
+    # Called synchronously from inside a loop: give the arm its own.
+    return _start_arm_thread(lambda _: asyncio.run(bounded()), None).result()
+
+
+@functools.lru_cache(maxsize=None)
+def _parameter_names(fn: Callable) -> Tuple[str, ...]:
+    return tuple(inspect.signature(fn).parameters)
+
+
+class CallView:
+    """
+    A read-only view of one call's bound arguments and derived values, by
+    attribute (`view.start`) or by key (`view["start"]`). A derived value is
+    computed on first access from the arguments (or other derived values)
+    named by its parameters, and reused for the rest of the call.
+    """
+    __slots__ = ("_arguments", "_derived", "_cache")
+
+    def __init__(self, arguments: Dict[str, Any], derived: Dict[str, Callable], cache: Dict[Callable, Any]):
+        self._arguments = arguments
+        self._derived = derived
+        self._cache = cache
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._arguments:
+            return self._arguments[name]
+        fn = self._derived[name]
+        try:
+            return self._cache[fn]
+        except KeyError:
+            pass
+        value = self._cache[fn] = fn(**{p: self[p] for p in _parameter_names(fn)})
+        return value
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._arguments or name in self._derived
+
+    def __repr__(self) -> str:
+        return f"CallView({', '.join(list(self._arguments) + list(self._derived))})"
+
+
+def _derive(view: CallView, name: str) -> Any:
+    try:
+        return view[name]
+    except Exception as e:
+        raise InvalidArgumentError(f"Derived value {name!r} could not be computed: {e!r}") from e
 
 
 @dataclass(frozen=True)
 class AssumptionContract:
     """A declarative, reusable contract of assumptions for a function."""
     preconditions: Dict[str, AssuranceMatcher] = field(default_factory=dict)
+    relations: AssuranceMatcher = None
+    derived: Dict[str, Callable[..., Any]] = field(default_factory=dict)
     postcondition: AssuranceMatcher = None
     environment: AssuranceMatcher = None
     on_success: Union[str, Callable[[], None]] = None
+    name: str = None
+    defer_on_success: bool = False
+    defer_postcondition: bool = False
+    snapshot: Callable[[Any], Any] = None
+    on_violation: Callable[[BaseException], None] = None
+    environment_ttl: float = None
+    budget: float = None
+    on_timeout: str = "fail"
+    priority: str = "critical"
+    tag_verified: bool = False
 
+    def __post_init__(self):
+        if self.on_timeout not in _TIMEOUT_POLICIES:
+            raise InvalidArgumentError(
+                f"on_timeout must be one of {_TIMEOUT_POLICIES}, not {self.on_timeout!r}.")
+        _validate_priority(self.priority)
+        if self.environment_ttl is not None and not self.name:
+            # The name is the cache key, shared across processes; nothing
+            # derived from the predicates themselves is both stable and unique.
+            raise InvalidArgumentError("A contract with environment_ttl needs a unique name to key its cached verdict.")
 
-def contract(*contracts: AssumptionContract):
+
+def contract(*contracts: AssumptionContract, recorder: Any = None):
     """
     A decorator that applies one or more AssumptionContracts to a function,
     wrapping it in a full validation lifecycle (environment, preconditions,
     postconditions).
+
+    Success and violation events are handed to the active EventSink (see
+    `set_event_sink`) rather than printed on the calling thread.
+
+    `derived` maps names to functions of the arguments (by parameter name),
+    e.g. `{"n": lambda xs: len(xs)}`. Each is computed at most once per call
+    and shared by every arm that needs it: `preconditions` may be keyed by a
+    derived name, and the `relations` matcher receives a CallView over all
+    arguments and derived values, for checks such as `v.start < v.end`.
+
+    Contracts with `defer_postcondition=True` return the result immediately
+    and check the postcondition (against `snapshot(result)` if given) on a
+    background worker; violations are reported to the event sink and to
+    `on_violation` instead of being raised.
+
+    A contract's `budget` (seconds) bounds the total time spent on its checks
+    in one call, on top of any per-arm `timeout`; `on_timeout` picks the
+    outcome when a budget runs out (see `AssuranceMatcher.check`).
+
+    With `environment_ttl` set, the environment verdict is cached for that
+    many seconds in the active CacheBackend (see `set_cache_backend`).
+
+    When a LoadGovernor is installed (see `set_governor`), arms whose
+    priority it is currently shedding are skipped or sampled; environment
+    checks are governed by the contract's own priority.
+
+    With `tag_verified=True`, values that pass are tagged with the arms they
+    passed, and any contract later seeing the same object skips those arms
+    (see `mark_verified`).
+
+    Every contract is registered at decoration time; `preflight()` runs all
+    of their environment checks at startup.
+
+    If a `recorder` (e.g. `principia.replay.TraceRecorder`) is given, every
+    call that passes its preconditions is offered to `recorder.sample(function,
+    arguments)` before the function runs, so the arguments are captured as
+    the preconditions saw them; a sample it returns is completed with
+    `recorder.commit(sample, result)` afterwards, for offline replay.
     """
     def decorator(func):
+        for c in contracts:
+            _register_contract(c, func)
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             sig = inspect.signature(func)
@@ -162,45 +686,95 @@ def contract(*contracts: AssumptionContract):
             bound_args.apply_defaults()
 
             all_checks_passed = True
+            spent = {}
+            derived_cache = {}
+            governor = _governor
+            if governor is not None:
+                started = time.perf_counter()
             for c in contracts:
+                deadline = None if c.budget is None else time.monotonic() + c.budget
+                label = None if governor is None else _contract_label(c, func)
                 try:
-                    if c.environment:
-                        c.environment.check()
+                    if c.environment and (governor is None or governor.admit(label, c.priority)):
+                        _check_environment(c, deadline)
 
+                    view = CallView(bound_args.arguments, c.derived, derived_cache) if c.derived or c.relations else None
                     for arg_name, matcher_template in c.preconditions.items():
                         if arg_name in bound_args.arguments:
                             arg_value = bound_args.arguments[arg_name]
-                            actual_matcher = matcher_template.__class__(arg_value, name=arg_name)
-                            actual_matcher._arms = matcher_template._arms
-                            actual_matcher.check()
-                except Exception:
+                        elif arg_name in c.derived:
+                            arg_value = _derive(view, arg_name)
+                        else:
+                            continue
+                        _check_value(matcher_template, arg_value, arg_name, c, label, governor, deadline)
+
+                    if c.relations:
+                        _check_value(c.relations, view, c.relations._name, c, label, governor, deadline)
+                except Exception as e:
                     all_checks_passed = False
+                    _emit_violation(c, func, e)
                     raise
+                if deadline is not None:
+                    spent[id(c)] = time.monotonic() - (deadline - c.budget)
 
+            sample = None if recorder is None else recorder.sample(func.__qualname__, bound_args.arguments)
+            if governor is not None:
+                called = time.perf_counter()
             result = func(*args, **kwargs)
+            if governor is not None:
+                returned = time.perf_counter()
+
+            if sample is not None:
+                recorder.commit(sample, result)
 
             for c in contracts:
+                if c.postcondition and c.defer_postcondition:
+                    get_deferred_executor().submit(c, func, result)
+                    continue
+                deadline = None if c.budget is None else time.monotonic() + c.budget - spent[id(c)]
                 try:
                     if c.postcondition:
-                        post_matcher = c.postcondition.__class__(result, name="ReturnValue")
-                        post_matcher._arms = c.postcondition._arms
-                        post_matcher.check()
-                except Exception:
+                        label = None if governor is None else _contract_label(c, func)
+                        _check_value(c.postcondition, result, "ReturnValue", c, label, governor, deadline)
+                except Exception as e:
                     all_checks_passed = False
+                    _emit_violation(c, func, e)
                     raise
 
+            if governor is not None:
+                governor.observe((called - started) + (time.perf_counter() - returned), returned - called)
+
             if all_checks_passed:
                 for c in contracts:
-                    if c.on_success:
-                        if isinstance(c.on_success, str):
-                            print(c.on_success)
-                        elif callable(c.on_success):
-                            c.on_success()
+                    # Deferred contracts report success from the worker once
+                    # their postcondition has actually been checked.
+                    if c.on_success and not (c.postcondition and c.defer_postcondition):
+                        _emit_success(c, func)
             return result
         return wrapper
     return decorator
 
 
+def _check_value(
+    template: AssuranceMatcher,
+    value: Any,
+    name: str,
+    c: AssumptionContract,
+    label: Optional[str],
+    governor: Any,
+    deadline: Optional[float]
+) -> None:
+    """Binds `template` to `value` and runs every arm not already proven or shed."""
+    matcher = template._bind(value, name)
+    if _verified_tags:
+        matcher._arms = _unproven_arms(value, matcher._arms)
+    if governor is not None:
+        matcher._arms = governor.filter(label, c.priority, matcher._arms)
+    matcher.check(deadline, c.on_timeout)
+    if c.tag_verified and c.on_timeout == "fail":
+        _tag_verified(value, matcher._arms)
+
+
 # ==============================================================================
 # SECTION 3: THE SEMANTIC VALIDATION LAYER
 # A rich vocabulary of readable checks to be used with the AssuranceMatcher.
@@ -234,11 +808,95 @@ def be_unmodified_builtin(name_str: str) -> Callable[[Any], bool]:
     return lambda v: v is true_builtin
 
 # --- Numeric Checks ---
-def be_greater_than(limit: float) -> Callable[[Any], bool]:
-    return lambda v: v > limit
+# These accept scalars, NumPy arrays and pandas Series/Index alike. Arrays are
+# scanned in cache-sized chunks over a view of the buffer and the scan stops
+# at the first offending chunk. `nan_policy` is "fail" (NaN violates the
+# check) or "ignore" (NaN elements are skipped).
+_CHUNK_BYTES = 256 * 1024
+
+def _as_array(v: Any) -> Any:
+    """Returns a zero-copy ndarray view of `v`, or None if `v` is not array-like."""
+    if np is None:
+        return None
+    if isinstance(v, np.ndarray):
+        return v
+    if hasattr(v, "to_numpy") and hasattr(v, "dtype"):
+        return v.to_numpy(copy=False)
+    return None
+
+def _array_chunks(arr: Any, chunk_bytes: int):
+    """Yields 1-D chunks of `arr` without materialising a copy of the whole array."""
+    step = max(1, chunk_bytes // max(arr.itemsize, 1))
+    if arr.flags.c_contiguous or arr.flags.f_contiguous:
+        flat = arr.reshape(-1, order="A")
+        for start in range(0, flat.size, step):
+            yield flat[start:start + step]
+    elif arr.size:
+        # Strided views are walked with a buffered iterator whose buffer is
+        # bounded by the chunk size, not the array size.
+        for chunk in np.nditer(arr, flags=["external_loop", "buffered", "zerosize_ok", "refs_ok"],
+                               buffersize=step, order="K"):
+            yield chunk
+
+def _all_elements(arr: Any, ok: Callable[[Any], Any], nan_policy: str, chunk_bytes: int) -> bool:
+    skip_nan = nan_policy == "ignore" and arr.dtype.kind in "fc"
+    for chunk in _array_chunks(arr, chunk_bytes):
+        passed = ok(chunk)
+        if skip_nan:
+            passed |= np.isnan(chunk)
+        if not passed.all():
+            return False
+    return True
+
+def _numeric_check(scalar_ok: Callable[[Any], bool], nan_policy: str, chunk_bytes: int) -> Callable[[Any], bool]:
+    if nan_policy not in ("fail", "ignore"):
+        raise InvalidArgumentError(f"nan_policy must be 'fail' or 'ignore', not {nan_policy!r}.")
+    def check(v: Any) -> bool:
+        arr = _as_array(v)
+        if arr is not None:
+            return _all_elements(arr, scalar_ok, nan_policy, chunk_bytes)
+        if nan_policy == "ignore" and isinstance(v, float) and math.isnan(v):
+            return True
+        return bool(scalar_ok(v))
+    # Applied to a whole column, the check already means "every element passes".
+    check.__principia_elementwise__ = True
+    return check
+
+def be_greater_than(limit: float, nan_policy: str = "fail", chunk_bytes: int = _CHUNK_BYTES) -> Callable[[Any], bool]:
+    """Checks that a value, or every element of an array, is greater than `limit`."""
+    return _numeric_check(lambda v: v > limit, nan_policy, chunk_bytes)
+
+def be_in_range(lower_bound: float, upper_bound: float, nan_policy: str = "fail",
+                chunk_bytes: int = _CHUNK_BYTES) -> Callable[[Any], bool]:
+    """Checks that a value, or every element of an array, lies in [lower_bound, upper_bound]."""
+    return _numeric_check(lambda v: (v >= lower_bound) & (v <= upper_bound), nan_policy, chunk_bytes)
+
+# --- Array Checks ---
+def have_dtype(expected_dtype: Any) -> Callable[[Any], bool]:
+    """Checks that an array or Series has exactly the given dtype (e.g. "float64")."""
+    def check(v: Any) -> bool:
+        return np is not None and hasattr(v, "dtype") and np.dtype(v.dtype) == np.dtype(expected_dtype)
+    return check
 
-def be_in_range(lower_bound: float, upper_bound: float) -> Callable[[Any], bool]:
-    return lambda v: lower_bound <= v <= upper_bound
+def have_shape(expected_shape: Tuple[Optional[int], ...]) -> Callable[[Any], bool]:
+    """Checks an array's shape; a None entry matches any size along that axis."""
+    def check(v: Any) -> bool:
+        shape = getattr(v, "shape", None)
+        return (shape is not None and len(shape) == len(expected_shape)
+                and all(e is None or e == s for e, s in zip(expected_shape, shape)))
+    return check
+
+def be_contiguous(order: str = "C") -> Callable[[Any], bool]:
+    """Checks that an array's buffer is contiguous in the given order ("C", "F" or "any")."""
+    flag = {"C": "c_contiguous", "F": "f_contiguous"}.get(order)
+    def check(v: Any) -> bool:
+        arr = _as_array(v)
+        if arr is None:
+            return False
+        if flag is None:
+            return arr.flags.c_contiguous or arr.flags.f_contiguous
+        return getattr(arr.flags, flag)
+    return check
 
 # --- String Checks ---
 def match_pattern(pattern: str) -> Callable[[str], bool]:
@@ -275,7 +933,898 @@ def ensure_precondition(condition: bool, *args: Any, **kwargs: Any) -> None:
 
 
 # ==============================================================================
-# SECTION 5: EXAMPLE USAGE
+# SECTION 5: EVENT SINKS
+# Where success and violation events go. The default sink keeps stdout I/O off
+# the hot path by draining a queue on a background thread in batches.
+# ==============================================================================
+
+@dataclass(frozen=True)
+class ContractEvent:
+    """
+    A single success or violation observed by the `contract` decorator.
+    `raised` is False for violations the caller never sees as an exception
+    (deferred postconditions).
+    """
+    kind: str
+    contract: str
+    message: str
+    function: str
+    timestamp: float
+    error: Optional[BaseException] = None
+    callback: Optional[Callable[[], None]] = None
+    raised: bool = True
+
+
+class EventSink:
+    """
+    Base class for event sinks. Subclasses must implement `emit`; `flush` and
+    `close` are optional hooks for sinks that buffer.
+    """
+    def emit(self, event: ContractEvent) -> None:
+        raise NotImplementedError
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+
+class PrintEventSink(EventSink):
+    """
+    Writes every event synchronously on the calling thread (the legacy
+    behaviour). Violations that were raised to the caller are only written
+    with `report_raised=True`.
+    """
+    def __init__(self, report_raised: bool = False):
+        self._report_raised = report_raised
+
+    def emit(self, event: ContractEvent) -> None:
+        if event.callback is not None:
+            event.callback()
+        elif event.kind == "success":
+            print(event.message)
+        elif self._report_raised or not event.raised:
+            print(f"[Principia] ❌ {event.contract}: {event.message}", file=sys.stderr)
+
+
+_FLUSH_TIMEOUT = 5.0
+_STOP = object()
+
+
+class QueueEventSink(EventSink):
+    """
+    The default sink. `emit` only enqueues the event; a daemon thread drains
+    the queue in batches, runs deferred `on_success` hooks, and writes lines.
+
+    Events are rate-limited per (kind, contract): the first one in each
+    `aggregate_window` is written verbatim, later ones are counted and
+    reported as a single summary line when the window closes, however much
+    their messages differ. Violations that were raised to the caller are
+    already visible as exceptions and are only written with
+    `report_raised=True`; deferred ones always are. Events arriving while the
+    queue is full are dropped and counted in `dropped`.
+    """
+    def __init__(
+        self,
+        stream: Optional[TextIO] = None,
+        error_stream: Optional[TextIO] = None,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        aggregate_window: float = 10.0,
+        max_queue: int = 100_000,
+        report_raised: bool = False
+    ):
+        self._stream = stream
+        self._error_stream = error_stream
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._aggregate_window = aggregate_window
+        self._report_raised = report_raised
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._windows: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self.dropped = 0
+
+    def emit(self, event: ContractEvent) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = _FLUSH_TIMEOUT) -> None:
+        """Blocks until every event queued so far has been written."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def close(self) -> None:
+        self.flush()
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(_FLUSH_TIMEOUT)
+        self._pid = None
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # After a fork the inherited thread object is dead and the queue
+            # may hold a copy of the parent's backlog; start from scratch.
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._windows = {}
+            self._thread = threading.Thread(target=self._run, name="principia-events", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self._flush_interval))
+                while len(batch) < self._batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            out, err, waiters, stop = [], [], [], False
+            for item in batch:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    self._process(item, out, err)
+            self._close_windows(time.monotonic(), out, err, force=bool(waiters) or stop)
+            self._write(out, err)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _process(self, event: ContractEvent, out: List[str], err: List[str]) -> None:
+        if event.callback is not None:
+            try:
+                event.callback()
+            except Exception as e:
+                err.append(f"[Principia] ❌ on_success hook for {event.contract} raised {e!r}")
+            return
+        if event.kind != "success" and event.raised and not self._report_raised:
+            return
+
+        now = time.monotonic()
+        key = (event.kind, event.contract)
+        window = self._windows.get(key)
+        if window is not None and now - window[0] < self._aggregate_window:
+            window[1] += 1
+            return
+        if window is not None:
+            self._summarize(key, window, out, err)
+        self._windows[key] = [now, 0]
+        if event.kind == "success":
+            out.append(event.message)
+        else:
+            err.append(f"[Principia] ❌ {event.contract}: {event.message}")
+
+    def _close_windows(self, now: float, out: List[str], err: List[str], force: bool = False) -> None:
+        for key, window in list(self._windows.items()):
+            if force or now - window[0] >= self._aggregate_window:
+                self._summarize(key, window, out, err)
+                del self._windows[key]
+
+    def _summarize(self, key: tuple, window: list, out: List[str], err: List[str]) -> None:
+        kind, contract_name = key
+        if window[1]:
+            verb = "passed" if kind == "success" else "failed"
+            (out if kind == "success" else err).append(
+                f"[Principia] {contract_name} {verb} {window[1]:,} more times "
+                f"in the last {self._aggregate_window:g}s."
+            )
+
+    def _write(self, out: List[str], err: List[str]) -> None:
+        for lines, stream in ((out, self._stream or sys.stdout), (err, self._error_stream or sys.stderr)):
+            if lines:
+                try:
+                    stream.write("\n".join(lines) + "\n")
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass
+
+
+_event_sink: Optional[EventSink] = None
+_event_sink_lock = threading.Lock()
+
+
+def get_event_sink() -> EventSink:
+    """Returns the active event sink, creating the default QueueEventSink on first use."""
+    global _event_sink
+    if _event_sink is None:
+        with _event_sink_lock:
+            if _event_sink is None:
+                _event_sink = QueueEventSink()
+    return _event_sink
+
+
+def set_event_sink(sink: Optional[EventSink]) -> Optional[EventSink]:
+    """
+    Installs `sink` as the destination for all contract events and returns
+    the previous sink (flushed). Passing None restores the default.
+    """
+    global _event_sink
+    with _event_sink_lock:
+        previous, _event_sink = _event_sink, sink
+    if previous is not None:
+        previous.flush()
+    return previous
+
+
+def _contract_label(c: AssumptionContract, func: Callable) -> str:
+    return c.name or getattr(func, "__qualname__", repr(func))
+
+
+def _emit_success(c: AssumptionContract, func: Callable) -> None:
+    if isinstance(c.on_success, str):
+        event = ContractEvent("success", _contract_label(c, func), c.on_success,
+                              func.__qualname__, time.time())
+    elif callable(c.on_success):
+        if not c.defer_on_success:
+            c.on_success()
+            return
+        event = ContractEvent("success", _contract_label(c, func), "", func.__qualname__,
+                              time.time(), callback=c.on_success)
+    else:
+        return
+    get_event_sink().emit(event)
+
+
+def _emit_violation(c: AssumptionContract, func: Callable, error: BaseException, raised: bool = True) -> None:
+    get_event_sink().emit(ContractEvent("violation", _contract_label(c, func), str(error),
+                                        func.__qualname__, time.time(), error=error, raised=raised))
+
+
+@atexit.register
+def _flush_event_sink() -> None:
+    if _event_sink is not None:
+        _event_sink.flush()
+
+
+# ==============================================================================
+# SECTION 6: DEFERRED POSTCONDITIONS
+# Shadow-mode postcondition checks that run off the caller's critical path.
+# ==============================================================================
+
+class DeferredPostconditionExecutor:
+    """
+    Checks deferred postconditions on background daemon threads.
+
+    The queue holds at most `max_queue` pending checks. When it is full,
+    `drop_policy` decides what is lost: "newest" discards the incoming check,
+    "oldest" evicts the longest-waiting one. Either way the loss is counted
+    in `dropped` and the caller is never blocked.
+    """
+    def __init__(self, max_queue: int = 10_000, drop_policy: str = "newest", workers: int = 1):
+        if drop_policy not in ("newest", "oldest"):
+            raise InvalidArgumentError(f"drop_policy must be 'newest' or 'oldest', not {drop_policy!r}.")
+        self._max_queue = max_queue
+        self._drop_policy = drop_policy
+        self._workers = workers
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self.dropped = 0
+
+    def submit(self, c: AssumptionContract, func: Callable, result: Any) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        if c.snapshot is not None:
+            try:
+                result = c.snapshot(result)
+            except Exception as e:
+                self._report(c, func, e)
+                return
+        job = (c, func, result)
+        try:
+            self._queue.put_nowait(job)
+            return
+        except queue.Full:
+            if self._drop_policy == "newest":
+                self.dropped += 1
+                return
+        try:
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self.dropped += 1
+        except queue.Empty:
+            pass
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.dropped += 1
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every submitted check has run. Returns False on timeout."""
+        if self._pid != os.getpid():
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self._max_queue)
+            for i in range(self._workers):
+                threading.Thread(target=self._run, name=f"principia-postconditions-{i}", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        q = self._queue
+        while True:
+            c, func, result = q.get()
+            try:
+                deadline = None if c.budget is None else time.monotonic() + c.budget
+                _check_value(c.postcondition, result, "ReturnValue", c, None, None, deadline)
+            except Exception as e:
+                self._report(c, func, e)
+            else:
+                if c.on_success:
+                    _emit_success(c, func)
+            finally:
+                q.task_done()
+
+    @staticmethod
+    def _report(c: AssumptionContract, func: Callable, error: BaseException) -> None:
+        _emit_violation(c, func, error, raised=False)
+        if c.on_violation is not None:
+            try:
+                c.on_violation(error)
+            except Exception:
+                pass
+
+
+_deferred_executor: Optional[DeferredPostconditionExecutor] = None
+_deferred_executor_lock = threading.Lock()
+
+
+def get_deferred_executor() -> DeferredPostconditionExecutor:
+    """Returns the executor for deferred postconditions, creating a default one on first use."""
+    global _deferred_executor
+    if _deferred_executor is None:
+        with _deferred_executor_lock:
+            if _deferred_executor is None:
+                _deferred_executor = DeferredPostconditionExecutor()
+    return _deferred_executor
+
+
+def set_deferred_executor(executor: Optional[DeferredPostconditionExecutor]) -> Optional[DeferredPostconditionExecutor]:
+    """Installs `executor` for deferred postconditions and returns the previous one."""
+    global _deferred_executor
+    with _deferred_executor_lock:
+        previous, _deferred_executor = _deferred_executor, executor
+    return previous
+
+
+# ==============================================================================
+# SECTION 7: VERDICT CACHE
+# TTL caching for environment checks and expensive predicates. The backend is
+# pluggable so that several processes on a host can share verdicts (see
+# `principia.sharedcache.SharedMemoryCache`).
+# ==============================================================================
+
+class CacheBackend:
+    """
+    Base class for verdict caches.
+
+    `fetch` implements the shared policy on top of three primitives that
+    subclasses provide: a fresh entry is returned as is; for an expired entry
+    exactly one caller (the one that wins the refresh lease) recomputes it
+    while everyone else keeps using the stale value; a missing entry is
+    computed by whoever asks for it.
+    """
+    def __init__(self, lease_seconds: float = 30.0):
+        self.lease_seconds = lease_seconds
+
+    def _read(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Returns (value, expires_at) or None."""
+        raise NotImplementedError
+
+    def _write(self, key: str, value: Any, expires_at: float) -> None:
+        raise NotImplementedError
+
+    def _try_lease(self, key: str, until: float) -> bool:
+        """Atomically claims the right to refresh `key` until `until`."""
+        raise NotImplementedError
+
+    def fetch(
+        self,
+        key: str,
+        ttl: float,
+        compute: Callable[[], Any],
+        keep: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Returns the cached value for `key`, computing it as described above.
+        A computed value for which `keep(value)` is false is returned but not
+        stored.
+        """
+        now = time.time()
+        entry = self._read(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now or not self._try_lease(key, now + self.lease_seconds):
+                return value
+        value = compute()
+        if keep is None or keep(value):
+            self._write(key, value, time.time() + ttl)
+        return value
+
+    def put(self, key: str, value: Any, ttl: float) -> None:
+        """Stores a value directly, e.g. to warm the cache ahead of first use."""
+        self._write(key, value, time.time() + ttl)
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class InProcessCache(CacheBackend):
+    """The default backend: a dictionary shared by the threads of one process."""
+    def __init__(self, lease_seconds: float = 30.0):
+        super().__init__(lease_seconds)
+        self._entries: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def _read(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._entries.get(key)
+        return None if entry is None else (entry[0], entry[1])
+
+    def _write(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = [value, expires_at, 0.0]
+
+    def _try_lease(self, key: str, until: float) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] > time.time():
+                return entry is None
+            entry[2] = until
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache_backend: Optional[CacheBackend] = None
+_cache_backend_lock = threading.Lock()
+
+
+def get_cache_backend() -> CacheBackend:
+    """Returns the active verdict cache, creating an InProcessCache on first use."""
+    global _cache_backend
+    if _cache_backend is None:
+        with _cache_backend_lock:
+            if _cache_backend is None:
+                _cache_backend = InProcessCache()
+    return _cache_backend
+
+
+def set_cache_backend(backend: Optional[CacheBackend]) -> Optional[CacheBackend]:
+    """Installs `backend` as the verdict cache and returns the previous one."""
+    global _cache_backend
+    with _cache_backend_lock:
+        previous, _cache_backend = _cache_backend, backend
+    return previous
+
+
+def cached_verdict(
+    predicate: Callable[[Any], bool],
+    ttl: float,
+    key: Union[str, Callable[[Any], str]]
+) -> Callable[[Any], bool]:
+    """
+    Wraps an expensive predicate so its verdict is cached for `ttl` seconds.
+    `key` is a fixed string for value-independent checks (e.g. connectivity)
+    or a function deriving a stable string from the value being checked.
+    """
+    def check(v: Any) -> bool:
+        cache_key = "verdict:" + (key if isinstance(key, str) else key(v))
+        def compute() -> bool:
+            try:
+                return bool(predicate(v))
+            except Exception:
+                return False
+        return get_cache_backend().fetch(cache_key, ttl, compute)
+    return check
+
+
+def _environment_key(c: AssumptionContract) -> str:
+    # Must be stable across processes, so it cannot rely on object identity;
+    # AssumptionContract requires a name whenever environment_ttl is set.
+    return f"environment:{c.name}"
+
+
+def _environment_verdict(
+    c: AssumptionContract,
+    deadline: Optional[float]
+) -> Tuple[Optional[type], Optional[str], bool]:
+    """
+    Returns (error class, message, settled). A verdict is not settled when a
+    budget ran out, whether that raised CheckTimeoutError or an on_timeout
+    policy decided the arm; such verdicts must not be cached.
+    """
+    matcher = c.environment._bind(c.environment._value, c.environment._name)
+    try:
+        matcher.check(deadline, c.on_timeout)
+    except Exception as e:
+        return (type(e), str(e), not matcher._timed_out)
+    return (None, None, not matcher._timed_out)
+
+
+def _check_environment(c: AssumptionContract, deadline: Optional[float] = None) -> None:
+    if c.environment_ttl is None:
+        c.environment.check(deadline, c.on_timeout)
+        return
+    error_cls, message, _ = get_cache_backend().fetch(
+        _environment_key(c), c.environment_ttl, lambda: _environment_verdict(c, deadline),
+        keep=lambda verdict: verdict[2])
+    if error_cls is not None:
+        raise error_cls(message)
+
+
+# ==============================================================================
+# SECTION 8: LOAD-SHEDDING GOVERNOR
+# Trades optional validation for latency under pressure, without a redeploy.
+# ==============================================================================
+
+# Shedding levels, escalated one step at a time: what each non-critical
+# priority is doing at that level. Anything not listed is fully on.
+_GOVERNOR_LEVELS = (
+    {},
+    {"optional": "sample"},
+    {"optional": "off"},
+    {"optional": "off", "normal": "sample"},
+    {"optional": "off", "normal": "off"},
+)
+_GOVERNOR_MODES = ("on", "sample", "off")
+
+
+class LoadGovernor:
+    """
+    Watches the latency of contract checks and of the decorated calls
+    (exponentially weighted moving averages) and sheds low-priority arms when
+    either exceeds its budget.
+
+    Each time an average is over budget for `hold_seconds`, the governor
+    escalates one level (see `_GOVERNOR_LEVELS`): optional arms are first
+    sampled at `sample_rate`, then disabled, then normal arms likewise.
+    Critical arms are never shed automatically. Once both averages fall
+    below `recover_ratio` times their budget, it steps back down, again at
+    most once per `hold_seconds`.
+
+    `state()` reports the current level, averages and overrides; `override()`
+    forces a mode for a contract name or a priority, and `pin()` freezes the
+    level, both at runtime.
+    """
+    def __init__(
+        self,
+        check_budget: Optional[float] = None,
+        call_budget: Optional[float] = None,
+        alpha: float = 0.05,
+        sample_rate: float = 0.1,
+        recover_ratio: float = 0.7,
+        hold_seconds: float = 5.0
+    ):
+        if check_budget is None and call_budget is None:
+            raise InvalidArgumentError("LoadGovernor needs a check_budget or a call_budget.")
+        self.check_budget = check_budget
+        self.call_budget = call_budget
+        self.alpha = alpha
+        self.sample_rate = sample_rate
+        self.recover_ratio = recover_ratio
+        self.hold_seconds = hold_seconds
+        self._check_ewma = 0.0
+        self._call_ewma = 0.0
+        self._level = 0
+        self._pinned: Optional[int] = None
+        self._changed_at = time.monotonic()
+        self._overrides: Dict[str, str] = {}
+        self._contracts: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, check_seconds: float, call_seconds: float) -> None:
+        """Feeds one call's check and call latency into the averages."""
+        a = self.alpha
+        self._check_ewma += a * (check_seconds - self._check_ewma)
+        self._call_ewma += a * (call_seconds - self._call_ewma)
+        now = time.monotonic()
+        if self._pinned is not None or now - self._changed_at < self.hold_seconds:
+            return
+        over = self._ratio()
+        if over > 1.0 and self._level < len(_GOVERNOR_LEVELS) - 1:
+            self._step(+1, now)
+        elif over < self.recover_ratio and self._level > 0:
+            self._step(-1, now)
+
+    def _ratio(self) -> float:
+        ratios = [0.0]
+        if self.check_budget:
+            ratios.append(self._check_ewma / self.check_budget)
+        if self.call_budget:
+            ratios.append(self._call_ewma / self.call_budget)
+        return max(ratios)
+
+    def _step(self, delta: int, now: float) -> None:
+        with self._lock:
+            if now - self._changed_at >= self.hold_seconds:
+                self._level = max(0, min(len(_GOVERNOR_LEVELS) - 1, self._level + delta))
+                self._changed_at = now
+
+    def mode(self, contract_name: str, priority: str) -> str:
+        """Returns "on", "sample" or "off" for an arm of `priority` in `contract_name`."""
+        if self._overrides:
+            forced = self._overrides.get(contract_name) or self._overrides.get(priority)
+            if forced is not None:
+                return forced
+        level = self._level if self._pinned is None else self._pinned
+        return _GOVERNOR_LEVELS[level].get(priority, "on")
+
+    def admit(self, contract_name: str, priority: str) -> bool:
+        """Decides whether one check of the given priority runs on this call."""
+        if contract_name not in self._contracts:
+            self._contracts[contract_name] = priority
+        mode = self.mode(contract_name, priority)
+        return mode == "on" or (mode == "sample" and random.random() < self.sample_rate)
+
+    def filter(self, contract_name: str, priority: str, arms: List[Arm]) -> List[Arm]:
+        """Returns the subset of `arms` admitted on this call."""
+        if not self._overrides and not _GOVERNOR_LEVELS[self._level if self._pinned is None else self._pinned]:
+            if contract_name not in self._contracts:
+                self._contracts[contract_name] = priority
+            return arms
+        return [arm for arm in arms if self.admit(contract_name, arm.priority or priority)]
+
+    def override(self, target: str, mode: Optional[str]) -> None:
+        """
+        Forces `mode` ("on", "sample" or "off") for a contract name or a
+        priority; contract overrides win. Pass None to remove the override.
+        """
+        if mode is not None and mode not in _GOVERNOR_MODES:
+            raise InvalidArgumentError(f"mode must be one of {_GOVERNOR_MODES} or None, not {mode!r}.")
+        with self._lock:
+            if mode is None:
+                self._overrides.pop(target, None)
+            else:
+                self._overrides[target] = mode
+
+    def pin(self, level: Optional[int]) -> None:
+        """Freezes the shedding level (0 = everything on); None resumes adaptation."""
+        if level is not None and not 0 <= level < len(_GOVERNOR_LEVELS):
+            raise InvalidArgumentError(f"level must be between 0 and {len(_GOVERNOR_LEVELS) - 1}.")
+        with self._lock:
+            self._pinned = level
+            self._changed_at = time.monotonic()
+
+    def state(self) -> Dict[str, Any]:
+        """A snapshot of the governor for dashboards and admin endpoints."""
+        level = self._level if self._pinned is None else self._pinned
+        return {
+            "level": level,
+            "pinned": self._pinned is not None,
+            "check_latency": self._check_ewma,
+            "call_latency": self._call_ewma,
+            "modes": {p: _GOVERNOR_LEVELS[level].get(p, "on") for p in PRIORITIES},
+            "overrides": dict(self._overrides),
+            "contracts": {name: self.mode(name, p) for name, p in list(self._contracts.items())},
+        }
+
+
+_governor: Optional[LoadGovernor] = None
+
+
+def get_governor() -> Optional[LoadGovernor]:
+    """Returns the installed LoadGovernor, or None if load shedding is off."""
+    return _governor
+
+
+def set_governor(governor: Optional[LoadGovernor]) -> Optional[LoadGovernor]:
+    """Installs `governor` (None disables load shedding) and returns the previous one."""
+    global _governor
+    previous, _governor = _governor, governor
+    return previous
+
+
+# ==============================================================================
+# SECTION 9: STARTUP PREFLIGHT
+# Every contract is registered when it decorates a function, so that all
+# environment checks can be run up front instead of on each first call.
+# ==============================================================================
+
+# id(contract) -> (contract, qualified names of the functions it decorates)
+_contract_registry: Dict[int, Tuple[AssumptionContract, List[str]]] = {}
+_contract_registry_lock = threading.Lock()
+
+
+def _register_contract(c: AssumptionContract, func: Callable) -> None:
+    with _contract_registry_lock:
+        entry = _contract_registry.setdefault(id(c), (c, []))
+        name = f"{func.__module__}.{func.__qualname__}"
+        if name not in entry[1]:
+            entry[1].append(name)
+
+
+def registered_contracts() -> List[Tuple[AssumptionContract, List[str]]]:
+    """Returns every contract applied with `@contract` so far, with the functions it guards."""
+    with _contract_registry_lock:
+        return [(c, list(funcs)) for c, funcs in _contract_registry.values()]
+
+
+@dataclass
+class PreflightReport:
+    """The outcome of `preflight()`, keyed by environment check label."""
+    passed: List[str] = field(default_factory=list)
+    failures: Dict[str, str] = field(default_factory=dict)
+    timed_out: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures and not self.timed_out
+
+
+def preflight(deadline: float = 30.0, raise_on_failure: bool = True) -> PreflightReport:
+    """
+    Runs the environment check of every registered contract (once per
+    contract name, or per contract object when unnamed) concurrently, within `deadline` seconds in total, and collects all of
+    the failures.
+
+    Verdicts of contracts with an `environment_ttl` are written to the
+    active cache backend, so the first real calls do not probe again.
+    Raises PreflightError listing every failure (or returns the report when
+    `raise_on_failure` is False).
+    """
+    started = time.monotonic()
+    distinct: Dict[Any, Tuple[AssumptionContract, str]] = {}
+    for c, funcs in registered_contracts():
+        if c.environment is not None:
+            # Named contracts are one check however many functions use them;
+            # unnamed ones are only the same check if they are the same contract.
+            key = _environment_key(c) if c.name else id(c)
+            if key not in distinct:
+                distinct[key] = (c, c.name or f"{funcs[0]} ({c.environment._name})")
+
+    futures = {}
+    for key, (c, label) in distinct.items():
+        futures[_start_arm_thread(lambda c: _environment_verdict(c, started + deadline), c)] = (key, c, label)
+    done, not_done = concurrent.futures.wait(futures, timeout=max(0.0, started + deadline - time.monotonic()))
+
+    report = PreflightReport()
+    for future in done:
+        key, c, label = futures[future]
+        error_cls, message, settled = future.result()
+        if error_cls is None:
+            report.passed.append(label)
+        else:
+            report.failures[label] = f"{error_cls.__name__}: {message}"
+        if c.environment_ttl is not None and settled:
+            get_cache_backend().put(key, (error_cls, message), c.environment_ttl)
+    for future in not_done:
+        report.timed_out.append(futures[future][2])
+    report.seconds = time.monotonic() - started
+
+    if raise_on_failure and not report.ok:
+        lines = [f"  - {label}: {error}" for label, error in sorted(report.failures.items())]
+        lines += [f"  - {label}: did not finish within {deadline:g}s" for label in sorted(report.timed_out)]
+        raise PreflightError(
+            f"{len(lines)} of {len(distinct)} environment checks failed:\n" + "\n".join(lines), report)
+    return report
+
+
+# ==============================================================================
+# SECTION 10: VERIFIED-VALUE TAGS
+# Lets a value checked at an outer boundary skip identical arms further in.
+# ==============================================================================
+
+class VersionedMixin:
+    """
+    Opt-in mutation tracking for verified-value tags. Every attribute
+    assignment bumps `__principia_version__`, which invalidates any tag
+    recorded for the object. Types with other mutators should bump it there.
+    """
+    __principia_version__ = 0
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name != "__principia_version__":
+            object.__setattr__(self, "__principia_version__", self.__principia_version__ + 1)
+
+
+class _Tag:
+    __slots__ = ("ref", "version", "arms")
+
+    def __init__(self, ref: "weakref.ref", version: Any):
+        self.ref = ref
+        self.version = version
+        self.arms: set = set()
+
+
+# id(value) -> _Tag. Only weak-referenceable values can be tagged; the weak
+# reference's callback removes the entry before the id can be reused.
+_verified_tags: Dict[int, _Tag] = {}
+_verified_lock = threading.Lock()
+
+
+def _live_tag(value: Any) -> Optional[_Tag]:
+    tag = _verified_tags.get(id(value))
+    if tag is None or tag.ref() is not value:
+        return None
+    if tag.version != getattr(value, "__principia_version__", None):
+        _verified_tags.pop(id(value), None)
+        return None
+    return tag
+
+
+def _unproven_arms(value: Any, arms: List[Arm]) -> List[Arm]:
+    tag = _live_tag(value)
+    if tag is None:
+        return arms
+    return [arm for arm in arms if arm.identity not in tag.arms]
+
+
+def _tag_verified(value: Any, arms: List[Arm]) -> None:
+    key = id(value)
+    with _verified_lock:
+        tag = _live_tag(value)
+        if tag is None:
+            try:
+                ref = weakref.ref(value, lambda _, key=key: _verified_tags.pop(key, None))
+            except TypeError:
+                return
+            tag = _verified_tags[key] = _Tag(ref, getattr(value, "__principia_version__", None))
+        tag.arms.update(arm.identity for arm in arms)
+
+
+def mark_verified(value: Any, *matchers: AssuranceMatcher) -> Any:
+    """
+    Records that `value` satisfies every arm of `matchers`, so contracts
+    skip those arms for this object. Returns `value`. Values that cannot be
+    weakly referenced (ints, strs, plain lists and dicts) are not tagged.
+    """
+    for matcher in matchers:
+        _tag_verified(value, matcher._arms)
+    return value
+
+
+def is_verified(value: Any, matcher: AssuranceMatcher) -> bool:
+    """True if every arm of `matcher` is already proven for `value`."""
+    return not _unproven_arms(value, matcher._arms) if _verified_tags else not matcher._arms
+
+
+def clear_verified(value: Any = None) -> None:
+    """Drops the tag of `value`, or every tag when called without arguments."""
+    with _verified_lock:
+        if value is None:
+            _verified_tags.clear()
+        elif _live_tag(value) is not None:
+            del _verified_tags[id(value)]
+
+
+# ==============================================================================
+# SECTION 11: EXAMPLE USAGE
 # Demonstrates the power and readability of the declarative Principia Engine.
 # ==============================================================================
 
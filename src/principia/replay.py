@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+"""
+replay.py: Record-and-replay of production contract traffic.
+
+A `TraceRecorder` passed to `@contract(..., recorder=...)` samples the bound
+arguments and return values of live calls into a compact, append-only,
+memory-mapped trace file. `replay()` later runs any set of AssumptionContracts
+against that trace at full speed, across several processes, and reports the
+throughput, the cost of each arm, and which recorded calls would fail.
+
+Trace file layout:
+
+    [ magic: 8 bytes ][ committed end offset: uint64 ][ reserved ... ]  (header)
+    [ frame length: uint32 ][ pickled (function, arguments, timestamp) ][ pickled result ] ...
+
+Arguments are pickled before the function runs, so a function that mutates
+its arguments is recorded with the inputs its preconditions saw. Frames are
+only ever appended; the end offset is updated after a frame is fully
+written, so a reader never observes a torn record. Processes sharing a file
+(e.g. forked workers) serialise their appends with an `flock` and always
+append at the committed end offset in the header.
+"""
+
+import asyncio
+import contextlib
+import io
+import mmap
+import multiprocessing
+import os
+import pickle
+import random
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .principia import AssumptionContract, AssuranceMatcher, CallView, ConfigurationError
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, which cannot fork either.
+    fcntl = None
+
+# ==============================================================================
+# SECTION 1: THE TRACE FILE
+# ==============================================================================
+
+_MAGIC = b"PRTRACE1"
+_HEADER = struct.Struct("<8sQ")
+_HEADER_SIZE = 64
+_FRAME = struct.Struct("<I")
+
+
+@dataclass(frozen=True)
+class TraceRecord:
+    """A single recorded call."""
+    function: str
+    arguments: Dict[str, Any]
+    result: Any
+    timestamp: float
+
+
+class TraceRecorder:
+    """
+    Appends a sample of contract-checked calls to a memory-mapped trace file.
+
+    `sample_rate` is the fraction of calls recorded. The file grows by
+    doubling up to `max_bytes`; once full, further samples are dropped.
+    Forked workers may share one file; a "{pid}" placeholder in `path`
+    gives each its own file instead. Calls whose arguments or result cannot
+    be pickled are skipped and counted in `skipped`.
+    """
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 0.01,
+        max_bytes: int = 1 << 30,
+        initial_bytes: int = 1 << 20
+    ):
+        self._path_template = path
+        self._sample_rate = sample_rate
+        self._max_bytes = max_bytes
+        self._initial_bytes = max(initial_bytes, _HEADER_SIZE * 2)
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._end = _HEADER_SIZE
+        self.recorded = 0
+        self.skipped = 0
+
+    @property
+    def path(self) -> str:
+        return self._path_template.format(pid=os.getpid())
+
+    def sample(self, function: str, arguments: Dict[str, Any]) -> Optional[bytes]:
+        """
+        Called by the contract wrapper before the function runs. Returns the
+        pickled arguments if this call is sampled, or None.
+        """
+        if self._sample_rate < 1.0 and random.random() >= self._sample_rate:
+            return None
+        try:
+            return pickle.dumps((function, dict(arguments), time.time()), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            self.skipped += 1
+            return None
+
+    def commit(self, sample: bytes, result: Any) -> None:
+        """Called by the contract wrapper after the call, to append a sampled call with its result."""
+        try:
+            payload = sample + pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            self.skipped += 1
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._open()
+            size = _FRAME.size + len(payload)
+            with self._file_lock():
+                # Another process may have appended since; the header is the truth.
+                _, end = _HEADER.unpack_from(self._map, 0)
+                if not self._reserve(end + size):
+                    self.skipped += 1
+                    return
+                self._map[end:end + _FRAME.size] = _FRAME.pack(len(payload))
+                self._map[end + _FRAME.size:end + size] = payload
+                self._end = end + size
+                _HEADER.pack_into(self._map, 0, _MAGIC, self._end)
+            self.recorded += 1
+
+    def record(self, function: str, arguments: Dict[str, Any], result: Any) -> None:
+        """Samples and appends a call in one step, for callers outside `contract`."""
+        sample = self.sample(function, arguments)
+        if sample is not None:
+            self.commit(sample, result)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None and self._pid == os.getpid():
+                with self._file_lock():
+                    _, self._end = _HEADER.unpack_from(self._map, 0)
+                    self._map.flush()
+                    self._map.close()
+                    # Other writers re-check the size under the lock before writing.
+                    self._file.truncate(self._end)
+                self._file.close()
+            self._map = self._file = None
+            self._pid = None
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _open(self) -> None:
+        # Runs on first use and again in a forked child, which needs its own
+        # open file (flock belongs to the open file description) and mapping.
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        path = self.path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._file = os.fdopen(fd, "r+b")
+        with self._file_lock():
+            size = os.fstat(fd).st_size
+            if size < _HEADER_SIZE:
+                self._file.truncate(self._initial_bytes)
+                self._map = mmap.mmap(fd, self._initial_bytes)
+                _HEADER.pack_into(self._map, 0, _MAGIC, _HEADER_SIZE)
+            else:
+                self._map = mmap.mmap(fd, size)
+                if _HEADER.unpack_from(self._map, 0)[0] != _MAGIC:
+                    raise ConfigurationError(f"{path} is not a Principia trace file.")
+            _, self._end = _HEADER.unpack_from(self._map, 0)
+        self._pid = os.getpid()
+
+    def _reserve(self, needed: int) -> bool:
+        """Makes the mapping cover `needed` bytes; call with the file lock held."""
+        size = os.fstat(self._file.fileno()).st_size
+        if len(self._map) != size:
+            # Another process grew (or closed and trimmed) the file.
+            self._remap(size)
+        if needed <= size:
+            return True
+        if needed > self._max_bytes:
+            return False
+        capacity = max(size, self._initial_bytes)
+        while capacity < needed:
+            capacity *= 2
+        capacity = min(capacity, self._max_bytes)
+        self._file.truncate(capacity)
+        self._remap(capacity)
+        return True
+
+    def _remap(self, size: int) -> None:
+        self._map.flush()
+        self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+
+class TraceReader:
+    """Read-only, memory-mapped view over a trace file."""
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._end = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            raise ConfigurationError(f"{path} is not a Principia trace file.")
+
+    def offsets(self) -> List[int]:
+        """Returns the byte offset of every committed frame, without unpickling."""
+        result, pos = [], _HEADER_SIZE
+        while pos < self._end:
+            result.append(pos)
+            pos += _FRAME.size + _FRAME.unpack_from(self._map, pos)[0]
+        return result
+
+    def read_at(self, offset: int) -> TraceRecord:
+        (length,) = _FRAME.unpack_from(self._map, offset)
+        start = offset + _FRAME.size
+        frame = io.BytesIO(self._map[start:start + length])
+        function, arguments, timestamp = pickle.load(frame)
+        return TraceRecord(function, arguments, pickle.load(frame), timestamp)
+
+    def __iter__(self) -> Iterator[TraceRecord]:
+        for offset in self.offsets():
+            yield self.read_at(offset)
+
+    def close(self) -> None:
+        self._map.close()
+
+
+# ==============================================================================
+# SECTION 2: THE REPLAY ENGINE
+# ==============================================================================
+
+@dataclass
+class ArmCost:
+    """Aggregated cost of a single arm over a replay."""
+    label: str
+    evaluations: int = 0
+    seconds: float = 0.0
+    failures: int = 0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.seconds / self.evaluations if self.evaluations else 0.0
+
+
+@dataclass(frozen=True)
+class ReplayFailure:
+    """A recorded call that the replayed contracts would have rejected."""
+    offset: int
+    function: str
+    arm: str
+    error: str
+
+
+@dataclass
+class ReplayReport:
+    """The outcome of `replay()`."""
+    calls: int = 0
+    failed_calls: int = 0
+    seconds: float = 0.0
+    arm_costs: Dict[str, ArmCost] = field(default_factory=dict)
+    failures: List[ReplayFailure] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """Replayed calls per second of wall-clock time."""
+        return self.calls / self.seconds if self.seconds else 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failed_calls / self.calls if self.calls else 0.0
+
+    def merge(self, other: "ReplayReport", max_failures: int) -> None:
+        self.calls += other.calls
+        self.failed_calls += other.failed_calls
+        for label, cost in other.arm_costs.items():
+            mine = self.arm_costs.setdefault(label, ArmCost(label))
+            mine.evaluations += cost.evaluations
+            mine.seconds += cost.seconds
+            mine.failures += cost.failures
+        self.failures.extend(other.failures[:max_failures - len(self.failures)])
+
+
+# Set in the parent before the pool forks; contracts usually hold lambdas and
+# cannot be pickled, so workers inherit them instead.
+_REPLAY_CONTRACTS: Sequence[AssumptionContract] = ()
+
+
+def _contract_label(c: AssumptionContract, index: int) -> str:
+    return c.name or f"contract[{index}]"
+
+
+def _run_matcher(
+    matcher: AssuranceMatcher,
+    value: Any,
+    name: str,
+    prefix: str,
+    report: ReplayReport
+) -> Optional[str]:
+    """Evaluates every arm of `matcher`, timing each; returns the first failure."""
+    first_failure = None
+    for arm in matcher._arms:
+        condition_func, error_cls, msg_template = arm.failure_condition, arm.then_raise, arm.message
+        label = f"{prefix}: {msg_template}"
+        cost = report.arm_costs.get(label)
+        if cost is None:
+            cost = report.arm_costs[label] = ArmCost(label)
+        start = time.perf_counter()
+        try:
+            if arm.is_async:
+                is_failure_match = asyncio.run(condition_func(value))
+            else:
+                is_failure_match = condition_func(value)
+        except Exception:
+            is_failure_match = True
+        cost.seconds += time.perf_counter() - start
+        cost.evaluations += 1
+        if is_failure_match:
+            cost.failures += 1
+            if first_failure is None:
+                try:
+                    message = msg_template.format(value=repr(value), name=name)
+                except Exception:
+                    message = msg_template
+                first_failure = (label, f"{error_cls.__name__}: {message}")
+    return first_failure
+
+
+def _replay_offsets(path: str, offsets: Sequence[int], function: Optional[str],
+                    max_failures: int) -> ReplayReport:
+    report = ReplayReport()
+    reader = TraceReader(path)
+    try:
+        for offset in offsets:
+            record = reader.read_at(offset)
+            if function is not None and record.function != function:
+                continue
+            report.calls += 1
+            call_failure = None
+            for index, c in enumerate(_REPLAY_CONTRACTS):
+                label = _contract_label(c, index)
+                view = CallView(record.arguments, c.derived, {})
+                for arg_name, matcher in c.preconditions.items():
+                    if arg_name not in view:
+                        continue
+                    try:
+                        value = view[arg_name]
+                    except Exception as e:
+                        call_failure = call_failure or (f"{label}.{arg_name}", f"derived value failed: {e!r}")
+                        continue
+                    failure = _run_matcher(matcher, value, arg_name, f"{label}.{arg_name}", report)
+                    call_failure = call_failure or failure
+                if c.relations:
+                    failure = _run_matcher(c.relations, view, c.relations._name, f"{label}.<relations>", report)
+                    call_failure = call_failure or failure
+                if c.postcondition:
+                    failure = _run_matcher(c.postcondition, record.result, "ReturnValue",
+                                           f"{label}.<return>", report)
+                    call_failure = call_failure or failure
+            if call_failure is not None:
+                report.failed_calls += 1
+                if len(report.failures) < max_failures:
+                    report.failures.append(ReplayFailure(offset, record.function, *call_failure))
+    finally:
+        reader.close()
+    return report
+
+
+def _replay_worker(args: Tuple[str, Sequence[int], Optional[str], int]) -> ReplayReport:
+    return _replay_offsets(*args)
+
+
+def replay(
+    path: str,
+    *contracts: AssumptionContract,
+    function: Optional[str] = None,
+    processes: Optional[int] = None,
+    max_failures: int = 100
+) -> ReplayReport:
+    """
+    Runs `contracts` against every record in the trace at `path` and returns
+    a ReplayReport. Environment matchers are not replayed; they describe the
+    live host, not the traffic.
+
+    `function` restricts the replay to records of one qualified name.
+    `processes` defaults to the CPU count; replay falls back to the current
+    process when the platform cannot fork.
+    """
+    global _REPLAY_CONTRACTS
+    reader = TraceReader(path)
+    try:
+        offsets = reader.offsets()
+    finally:
+        reader.close()
+
+    processes = processes or os.cpu_count() or 1
+    can_fork = "fork" in multiprocessing.get_all_start_methods()
+    if not can_fork or len(offsets) < processes * 2:
+        processes = 1
+
+    start = time.perf_counter()
+    _REPLAY_CONTRACTS = contracts
+    try:
+        if processes == 1:
+            report = _replay_offsets(path, offsets, function, max_failures)
+        else:
+            step = -(-len(offsets) // processes)
+            chunks = [(path, offsets[i:i + step], function, max_failures)
+                      for i in range(0, len(offsets), step)]
+            report = ReplayReport()
+            with multiprocessing.get_context("fork").Pool(processes) as pool:
+                for partial in pool.map(_replay_worker, chunks):
+                    report.merge(partial, max_failures)
+    finally:
+        _REPLAY_CONTRACTS = ()
+    report.seconds = time.perf_counter() - start
+    return report
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+sharedcache.py: A verdict cache shared by every process on a host.
+
+Pre-fork servers run the same environment probes and expensive verdicts in
+each worker. `SharedMemoryCache` stores them in a memory-mapped file instead,
+so one worker's result serves all of them:
+
+    principia.set_cache_backend(SharedMemoryCache("/dev/shm/myapp.principia"))
+
+The file is a fixed-size table of slots addressed by a hash of the key.
+Readers never lock: each slot carries a sequence counter that writers make
+odd while they modify the slot, and a reader retries if the counter changed
+under it (a seqlock). Writers serialise on an `flock` of the file. Expired
+entries are refreshed by whichever process first claims the slot's lease;
+the others keep reading the stale value until the refresh lands.
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+from .principia import CacheBackend, ConfigurationError
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows.
+    fcntl = None
+
+_MAGIC = b"PRCACHE1"
+_FILE_HEADER = struct.Struct("<8sII")
+# seq, key hash, expires_at, lease_until, payload length
+_SLOT_HEADER = struct.Struct("<QQddI")
+_READ_RETRIES = 100
+
+
+class SharedMemoryCache(CacheBackend):
+    """
+    A CacheBackend stored in a memory-mapped file at `path` (a tmpfs path such
+    as /dev/shm keeps it off disk). All processes must agree on `slots` and
+    `slot_size`; values whose pickle does not fit in a slot are not cached.
+    Colliding keys simply evict each other.
+    """
+    def __init__(self, path: str, slots: int = 1024, slot_size: int = 1024, lease_seconds: float = 30.0):
+        if fcntl is None:
+            raise ConfigurationError("SharedMemoryCache requires fcntl (POSIX).")
+        super().__init__(lease_seconds)
+        self.path = path
+        self._slots = slots
+        self._slot_size = slot_size
+        self._payload_max = slot_size - _SLOT_HEADER.size
+        self._size = _FILE_HEADER.size + slots * slot_size
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+
+    def _mapping(self) -> mmap.mmap:
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._open()
+        return self._map
+
+    def _open(self) -> None:
+        # A forked child reopens the file: flock belongs to the open file
+        # description, which parent and child would otherwise share.
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._file = os.fdopen(fd, "r+b")
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size < self._size:
+                self._file.truncate(self._size)
+            self._map = mmap.mmap(fd, self._size)
+            magic, slots, slot_size = _FILE_HEADER.unpack_from(self._map, 0)
+            if magic == b"\0" * 8:
+                _FILE_HEADER.pack_into(self._map, 0, _MAGIC, self._slots, self._slot_size)
+            elif (magic, slots, slot_size) != (_MAGIC, self._slots, self._slot_size):
+                raise ConfigurationError(
+                    f"{self.path} has an incompatible layout ({slots} slots of {slot_size} bytes).")
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._pid = os.getpid()
+
+    def _locate(self, key: str) -> Tuple[int, int]:
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        return digest, _FILE_HEADER.size + (digest % self._slots) * self._slot_size
+
+    def _read_slot(self, offset: int) -> Optional[Tuple[int, float, float, bytes]]:
+        mm = self._mapping()
+        for _ in range(_READ_RETRIES):
+            seq, key_hash, expires_at, lease_until, length = _SLOT_HEADER.unpack_from(mm, offset)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            start = offset + _SLOT_HEADER.size
+            payload = mm[start:start + min(length, self._payload_max)]
+            if _SLOT_HEADER.unpack_from(mm, offset)[0] == seq:
+                return key_hash, expires_at, lease_until, payload
+        return None
+
+    def _locked_update(self, offset: int, update) -> Any:
+        """Runs `update(seq)` with the slot marked as being written."""
+        mm = self._mapping()
+        with self._lock:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                seq = _SLOT_HEADER.unpack_from(mm, offset)[0]
+                struct.pack_into("<Q", mm, offset, seq + 1)
+                try:
+                    return update()
+                finally:
+                    struct.pack_into("<Q", mm, offset, seq + 2)
+            finally:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _read(self, key: str) -> Optional[Tuple[Any, float]]:
+        key_hash, offset = self._locate(key)
+        slot = self._read_slot(offset)
+        if slot is None or slot[0] != key_hash or not slot[3]:
+            return None
+        try:
+            stored_key, value = pickle.loads(slot[3])
+        except Exception:
+            return None
+        return (value, slot[1]) if stored_key == key else None
+
+    def _write(self, key: str, value: Any, expires_at: float) -> None:
+        try:
+            payload = pickle.dumps((key, value), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        if len(payload) > self._payload_max:
+            return
+        key_hash, offset = self._locate(key)
+        mm = self._mapping()
+        def update() -> None:
+            start = offset + _SLOT_HEADER.size
+            mm[start:start + len(payload)] = payload
+            struct.pack_into("<QddI", mm, offset + 8, key_hash, expires_at, 0.0, len(payload))
+        self._locked_update(offset, update)
+
+    def _try_lease(self, key: str, until: float) -> bool:
+        key_hash, offset = self._locate(key)
+        mm = self._mapping()
+        # Cheap lock-free pre-check so that losers do not contend for the lock.
+        slot = self._read_slot(offset)
+        if slot is not None and slot[0] == key_hash and slot[2] > time.time():
+            return False
+        def update() -> bool:
+            _, stored_hash, _, lease_until, _ = _SLOT_HEADER.unpack_from(mm, offset)
+            if stored_hash == key_hash and lease_until > time.time():
+                return False
+            struct.pack_into("<d", mm, offset + 24, until)
+            return True
+        return self._locked_update(offset, update)
+
+    def clear(self) -> None:
+        mm = self._mapping()
+        for i in range(self._slots):
+            offset = _FILE_HEADER.size + i * self._slot_size
+            self._locked_update(offset, lambda: struct.pack_into("<QddI", mm, offset + 8, 0, 0.0, 0.0, 0))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._file.close()
+            self._map = self._file = None
+            self._pid = None